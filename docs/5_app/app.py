@@ -19,6 +19,8 @@ Node (object)
 - nodes have default position and size (pos, size)
 - nodes are automatically placed at creation (dir, gap)
 - nodes inherit options (color, size, ...) from the previous object
+- nodes can have child nodes (parent=node), placed relative to the parent
+  and clipped to it
 
 A Node object has the following properties
 
@@ -34,15 +36,28 @@ Debug
 - display outline (cmd+O)
 """
 
+import bisect
 import copy
+import collections
 import inspect
+import io
+import itertools
+import math
+import mmap
 import os
+import pickle
+import queue
 import sys
+import threading
+import types
+import zlib
 
 import numpy as np
 import pygame
 from pygame.locals import *
 
+_missing = object()  # an attribute which is not set yet
+
 DBG_EVENTS = 1
 DBG_LABELS = 2
 DBG_OUTLINE = 4
@@ -61,6 +76,12 @@ class App:
     root = None
     debug = DBG_LABELS + DBG_OUTLINE
     key_repeat = 200, 100
+    log_queue = queue.SimpleQueue()  # debug messages, printed by log_thread
+    log_thread = None
+    fonts = {}       # cached fonts, by (name, size, bold, italic, underline)
+    font_keys = {}   # id(font) -> key, to save fonts in snapshots
+    images = {}      # cached image files, by (path, size)
+    image_keys = {}  # id(image) -> key, to save images as file references
 
     def __init__(self, size=(640, 240), shortcuts={}):
         """Initialize pygame and the application."""
@@ -113,21 +134,83 @@ class App:
 
     def run(self):
         """Run the main event loop."""
-        while App.running:
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    App.running = False
+        try:
+            while App.running:
+                for event in pygame.event.get():
+                    if event.type == QUIT:
+                        App.running = False
 
-                elif event.type == KEYDOWN:
-                    self.do_shortcut(event)
+                    elif event.type == KEYDOWN:
+                        self.do_shortcut(event)
 
-                # Send the event to the scene
-                App.scene.do_event(event)
-            App.scene.update()
-            App.scene.draw()
+                    # Send the event to the scene
+                    App.scene.do_event(event)
+                App.scene.update()
+                App.scene.draw()
+        finally:
+            App.close_log()
 
         pygame.quit()
 
+    @staticmethod
+    def log(*args):
+        """Queue a debug message, printed by a background thread."""
+        if App.log_thread == None:
+            App.log_thread = threading.Thread(target=App.print_log, daemon=True)
+            App.log_thread.start()
+        App.log_queue.put(args)
+
+    @staticmethod
+    def print_log():
+        """Print the queued debug messages, in batches, outside the event loop.
+        A None message stops the thread, after the messages before it."""
+        while True:
+            lines = [App.log_queue.get()]
+            while lines[-1] != None and not App.log_queue.empty():
+                lines.append(App.log_queue.get())
+            done = lines[-1] == None
+            if done:
+                lines.pop()
+            if lines:
+                text = '\n'.join(' '.join(map(str, args)) for args in lines)
+                sys.stdout.write(text + '\n')
+                sys.stdout.flush()
+            if done:
+                return
+
+    @staticmethod
+    def close_log():
+        """Print the messages still in the queue and stop the log thread."""
+        if App.log_thread != None:
+            App.log_queue.put(None)
+            App.log_thread.join()
+            App.log_thread = None
+
+    @staticmethod
+    def get_font(name=None, size=24, bold=False, italic=False, underline=False):
+        """Return a font, created once for each set of parameters."""
+        key = name, size, bold, italic, underline
+        if key not in App.fonts:
+            font = pygame.font.Font(name, size)
+            font.set_bold(bold)
+            font.set_italic(italic)
+            font.set_underline(underline)
+            App.fonts[key] = font
+            App.font_keys[id(font)] = key
+        return App.fonts[key]
+
+    @staticmethod
+    def load_image(path, size=None):
+        """Return an image file scaled to size, loaded once."""
+        key = path, size
+        if key not in App.images:
+            img = pygame.image.load(path)
+            if size != None:
+                img = pygame.transform.smoothscale(img, size)
+            App.images[key] = img
+            App.image_keys[id(img)] = key
+        return App.images[key]
+
     def next_scene(self, d=1):
         """Switch to the next scene."""
         i = App.scenes.index(App.scene)
@@ -171,6 +254,216 @@ class App:
     def __str__(self):
         return self.__class__.__name__
 
+class SpatialHash:
+    """Find the nodes in a rect without testing every node, by hashing
+    the node rects into a grid of square cells."""
+    size = 256  # cell size in pixels
+
+    def __init__(self):
+        self.cells = {}  # (i, j) -> set of nodes
+        self.keys = {}   # node -> cell range
+
+    def cell_range(self, rect):
+        """Return the range of cells (i0, j0, i1, j1) covered by rect."""
+        s = SpatialHash.size
+        return (rect.left // s, rect.top // s,
+                max(rect.left, rect.right-1) // s, max(rect.top, rect.bottom-1) // s)
+
+    def insert(self, node):
+        key = self.cell_range(node.rect)
+        self.keys[node] = key
+        i0, j0, i1, j1 = key
+        for i in range(i0, i1+1):
+            for j in range(j0, j1+1):
+                self.cells.setdefault((i, j), set()).add(node)
+
+    def remove(self, node):
+        key = self.keys.pop(node, None)
+        if key == None:
+            return
+        i0, j0, i1, j1 = key
+        for i in range(i0, i1+1):
+            for j in range(j0, j1+1):
+                self.cells[i, j].discard(node)
+
+    def update(self, node):
+        """Move an indexed node to the cells of its current rect."""
+        key = self.keys.get(node)
+        if key != None and key != self.cell_range(node.rect):
+            self.remove(node)
+            self.insert(node)
+
+    def build(self, nodes):
+        self.cells = {}
+        self.keys = {}
+        for node in nodes:
+            self.insert(node)
+
+    def query(self, rect):
+        """Return the set of nodes whose cells overlap rect."""
+        i0, j0, i1, j1 = self.cell_range(rect)
+        nodes = set()
+        for i in range(i0, i1+1):
+            for j in range(j0, j1+1):
+                cell = self.cells.get((i, j))
+                if cell:
+                    nodes.update(cell)
+        return nodes
+
+class Camera:
+    """Show part of a large world: drag with the right mouse button to pan,
+    use the mouse wheel to zoom. Nodes are placed in world coordinates."""
+    zoom_step = 2 ** 0.25  # zoom factor for one wheel click
+    zoom_range = 1/16, 16
+
+    def __init__(self, pos=(0, 0), zoom=1):
+        self.x, self.y = pos
+        self.zoom = zoom
+        self.rest = 0, 0  # fraction of a pixel of the mouse motion
+
+    def to_world(self, pos):
+        """Convert a screen position to world coordinates."""
+        return self.x + pos[0] / self.zoom, self.y + pos[1] / self.zoom
+
+    def to_screen(self, rect):
+        """Convert a world rect to screen coordinates."""
+        z = self.zoom
+        return Rect((rect.x - self.x) * z, (rect.y - self.y) * z, rect.w * z, rect.h * z)
+
+    def get_origin(self):
+        """Return the screen position of the world origin."""
+        return -self.x * self.zoom, -self.y * self.zoom
+
+    def get_view(self, rect):
+        """Return the world rect visible in the screen rect."""
+        z = self.zoom
+        return Rect(self.x, self.y, rect.width / z + 1, rect.height / z + 1)
+
+    def pan(self, rel):
+        """Move the view by rel screen pixels."""
+        self.x -= rel[0] / self.zoom
+        self.y -= rel[1] / self.zoom
+
+    def zoom_at(self, steps, pos):
+        """Zoom by a number of steps, keeping the world point at pos in place."""
+        x, y = self.to_world(pos)
+        z0, z1 = Camera.zoom_range
+        self.zoom = min(max(self.zoom * Camera.zoom_step ** steps, z0), z1)
+        self.x = x - pos[0] / self.zoom
+        self.y = y - pos[1] / self.zoom
+
+    def do_event(self, event):
+        """Pan and zoom, return True if the event was used."""
+        if event.type == MOUSEMOTION and event.buttons[2]:
+            self.pan(event.rel)
+            return True
+        if event.type == MOUSEWHEEL and App.scene.focus == None:
+            self.zoom_at(event.y, pygame.mouse.get_pos())
+            return True
+        return False
+
+    def world_event(self, event):
+        """Return a mouse event with position and motion in world coordinates.
+        They are whole pixels, as the nodes expect: the fractions of a pixel
+        of the motion are kept for the next event, so that slow drags move
+        at a high zoom."""
+        if not hasattr(event, 'pos'):
+            return event
+        if event.type == MOUSEBUTTONDOWN:
+            self.rest = 0, 0
+        x, y = self.to_world(event.pos)
+        d = {'pos': (math.floor(x), math.floor(y))}
+        if hasattr(event, 'rel'):
+            dx = self.rest[0] + event.rel[0] / self.zoom
+            dy = self.rest[1] + event.rel[1] / self.zoom
+            d['rel'] = round(dx), round(dy)
+            self.rest = dx - d['rel'][0], dy - d['rel'][1]
+        return pygame.event.Event(event.type, event.dict, **d)
+
+class Snapshot:
+    """Save and load scenes with pickle. Fonts are saved by their parameters,
+    image files by their path, and the other surfaces as pixels in an optional
+    bundle. Without the bundle, the nodes render their images again."""
+
+    def __init__(self, surfaces=True):
+        self.surfaces = surfaces
+        self.table = []  # surface records
+        self.index = {}  # id(surface) -> index in table
+        self.objs = []   # keep the saved surfaces alive while their id is used
+
+    def persistent_id(self, obj):
+        if isinstance(obj, pygame.font.Font):
+            if id(obj) not in App.font_keys:
+                raise pickle.PicklingError('only fonts from App.get_font() can be saved')
+            return 'font', App.font_keys[id(obj)]
+        if isinstance(obj, pygame.Surface):
+            return 'surface', self.add_surface(obj)
+        return None
+
+    def add_surface(self, img):
+        """Add a surface record to the table and return its index."""
+        if id(img) in self.index:
+            return self.index[id(img)]
+        if id(img) in App.image_keys:
+            record = 'file', App.image_keys[id(img)]
+        elif img.get_parent() != None:
+            record = 'sub', self.add_surface(img.get_parent()), img.get_offset(), img.get_size()
+        elif self.surfaces:
+            fmt = 'RGBA' if img.get_flags() & SRCALPHA else 'RGB'
+            data = zlib.compress(pygame.image.tobytes(img, fmt), 1)
+            record = 'pixels', img.get_size(), fmt, img.get_colorkey(), data
+        else:
+            record = None
+        self.index[id(img)] = len(self.table)
+        self.table.append(record)
+        self.objs.append(img)
+        return self.index[id(img)]
+
+    def load_surface(self, record):
+        """Return the surface of a table record, or None if it was not saved."""
+        if record == None:
+            return None
+        kind = record[0]
+        if kind == 'file':
+            return App.load_image(*record[1])
+        if kind == 'sub':
+            parent = self.loaded[record[1]]
+            return None if parent == None else parent.subsurface(Rect(record[2], record[3]))
+        size, fmt, colorkey, data = record[1:]
+        if 0 in size:
+            img = pygame.Surface(size, flags=SRCALPHA if fmt == 'RGBA' else 0)
+        else:
+            img = pygame.image.frombytes(zlib.decompress(data), size, fmt)
+        if colorkey != None:
+            img.set_colorkey(colorkey)
+        return img
+
+    def persistent_load(self, pid):
+        kind, key = pid
+        if kind == 'font':
+            return App.get_font(*key)
+        return self.loaded[key]
+
+    def save(self, obj, file):
+        """Save obj to file, the surface table is written before the objects."""
+        buf = io.BytesIO()
+        pickler = pickle.Pickler(buf, pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = self.persistent_id
+        pickler.dump(obj)
+        with open(file, 'wb') as f:
+            pickle.dump((self.table, buf.getvalue()), f, pickle.HIGHEST_PROTOCOL)
+
+    def load(self, file):
+        """Load an object from file."""
+        with open(file, 'rb') as f:
+            self.table, data = pickle.load(f)
+        self.loaded = []
+        for record in self.table:
+            self.loaded.append(self.load_surface(record))
+        unpickler = pickle.Unpickler(io.BytesIO(data))
+        unpickler.persistent_load = self.persistent_load
+        return unpickler.load()
+
 class Scene:
     """Create a new scene and initialize the node options."""
     options = { 'id': 0,
@@ -192,7 +485,7 @@ class Scene:
     selection_border = (Color('cyan'), 1)
     status_line = (Color('black'), Color('gray'), 20)  # col, bg, size
 
-    def __init__(self, caption='Pygame', remember=True, **options):
+    def __init__(self, caption='Pygame', remember=True, camera=False, **options):
         # Append the new scene and make it the current scene
         App.scenes.append(self)
         App.scene = self
@@ -201,6 +494,14 @@ class Scene:
 
         self.clicks = 0  # for double-clicks
         self.text = ''   # for copy/paste
+        self.status_event = None  # last debug event, shown once per frame
+        self.dirty_rects = []  # rects of the nodes rendered in the last frame
+        self.layouts = []  # Layout objects, which arrange nodes
+        self.dirty_nodes = {}  # nodes to render before the next draw
+        self.camera = Camera() if camera else None  # view of a large world
+        self.index = SpatialHash()  # top-level nodes, used with a camera
+        self.index_dirty = False  # nodes were added or removed
+        self.z = 0  # drawing order of the last node placed on top
 
         # Reset Node options to default
         Node.reset_options()
@@ -226,7 +527,7 @@ class Scene:
             self.img = pygame.Surface(self.rect.size)
             self.img.fill(self.bg)
 
-        self.render_status()
+        self.create_status()
         self.enter()
 
     def load_img(self, file): 
@@ -234,8 +535,7 @@ class Scene:
         module = sys.modules['__main__']
         path, name = os.path.split(module.__file__)
         path = os.path.join(path, self.img_folder, file)       
-        self.img = pygame.image.load(path)    
-        self.img = pygame.transform.smoothscale(self.img, self.rect.size)
+        self.img = App.load_image(path, self.rect.size)
      
     def enter(self):
         """Enter a scene."""
@@ -247,43 +547,129 @@ class Scene:
             node.update()
 
     def set_status(self, txt):
-        """Set status text and render it."""
-        self.status = txt
-        self.render_status()
+        """Set status text, it is rendered at most once per frame."""
+        if txt != self.status:
+            self.status = txt
+            self.status_dirty = True
 
-    def render_status(self):
-        """Render the status text."""
+    def create_status(self):
+        """Create the status font and the persistent status line surface."""
         col, bg, size = Scene.status_line
-        font = pygame.font.Font(None, size)
-        self.status_img0 = font.render(self.status, True, col, bg)
-
-        w, h = font.size(self.status)
+        self.status_font = App.get_font(None, size)
+        h = self.status_font.get_height()
         self.status_rect = Rect(0, 0, self.rect.width, h)
         self.status_rect.bottomleft = self.rect.bottomleft
+        self.status_img = pygame.Surface(self.status_rect.size, flags=SRCALPHA)
+        self.render_status()
 
-        self.status_img = pygame.Surface((self.rect.width, h), flags=SRCALPHA)
-        if bg != None:
-            self.status_img.fill(bg)
+    def render_status(self):
+        """Render the status text into the status line surface."""
+        col, bg, size = Scene.status_line
+        self.status_img.fill((0, 0, 0, 0) if bg == None else bg)
+        self.status_img0 = self.status_font.render(self.status, True, col, bg)
         self.status_img.blit(self.status_img0, (0, 0))
+        self.status_dirty = False
 
     def draw(self):
         """Draw all objects in the scene."""
+        self.refresh()
         App.screen.blit(self.img, self.rect)
-        for node in self.nodes:
-            node.draw()
+        if self.camera != None:
+            self.draw_view()
+        else:
+            for node in self.nodes:
+                if node.rect.colliderect(self.rect):
+                    node.draw()
         
         col, d = Scene.selection_border
-        pygame.draw.rect(App.screen, col, self.selection_rect, d)
+        rect = self.selection_rect
+        if self.camera != None:
+            rect = self.camera.to_screen(rect)
+        pygame.draw.rect(App.screen, col, rect, d)
+        if self.status_event != None:
+            self.set_status(str(self.status_event))
+            self.status_event = None
+        if self.status_dirty:
+            self.render_status()
         App.screen.blit(self.status_img, self.status_rect)
         
         pygame.display.flip()
 
+    def draw_view(self):
+        """Draw only the nodes in the camera view, zoomed."""
+        cam = self.camera
+        nodes = self.query(cam.get_view(self.rect))
+        origin = cam.get_origin()
+        for node in sorted(nodes, key=lambda node: node.z):
+            node.draw(origin, cam.zoom)
+
+    def query(self, rect):
+        """Return the top-level nodes which may overlap the world rect."""
+        if self.index_dirty:
+            self.index.build(self.nodes)
+            self.index_dirty = False
+        return self.index.query(rect)
+
+    def moved(self, node):
+        """Update the spatial index after a node has moved or changed size."""
+        if self.camera != None:
+            self.index.update(node)
+
+    def next_z(self):
+        """Return the drawing order for a node placed on top."""
+        self.z += 1
+        return self.z
+
+    def refresh(self):
+        """Render the dirty nodes once, collect their rects and update the layouts."""
+        self.dirty_rects = []
+        nodes, self.dirty_nodes = self.dirty_nodes, {}
+        for node in nodes:
+            if node.dirty:
+                node.dirty = False
+                size = node.rect.size
+                node.refresh()
+                node.zoom_key = None
+                self.moved(node)
+                self.dirty_rects.append(node.get_world_rect().copy())
+                if node.rect.size != size and node.layout != None:
+                    node.layout.invalidate()
+
+        for layout in self.layouts:
+            if layout.layout == None and layout.layout_dirty:
+                layout.do_layout()
+
+    def resize(self, size):
+        """Adapt the background and status line to a new window size,
+        and place the anchored layouts again."""
+        self.rect = Rect(0, 0, *size)
+        if self.file != '':
+            self.load_img(self.file)
+        else:
+            self.img = pygame.Surface(self.rect.size)
+            self.img.fill(self.bg)
+        self.create_status()
+
+        for layout in self.layouts:
+            if layout.anchor != None:
+                layout.invalidate()
+
     def do_event(self, event):
         """Handle the events of the scene."""
         mods = pygame.key.get_mods()
         if App.debug & DBG_EVENTS:
-            print(event)
-            self.set_status(str(event))
+            App.log(event)
+            self.status_event = event
+
+        if self.camera != None:
+            if self.camera.do_event(event):
+                return
+            event = self.camera.world_event(event)
+            if event.type in (MOUSEBUTTONDOWN, MOUSEBUTTONUP) and event.button in (4, 5):
+                # the wheel zooms or scrolls the focus node, it does not click
+                if self.focus != None:
+                    self.focus.do_event(self.focus.local_event(event))
+                return
 
         if event.type == KEYDOWN:
             k = event.key
@@ -299,14 +685,19 @@ class Scene:
                 self.moving = True
             else:
                 self.focus = None
-                for node in reversed(self.nodes):
-                    if node.rect.collidepoint(event.pos):
-                        self.focus = node
-                        self.set_status(str(node))
+                nodes = self.nodes
+                if self.camera != None:
+                    # only test the nodes near the click
+                    nodes = sorted(self.query(Rect(event.pos, (1, 1))), key=lambda node: node.z)
+                for node in reversed(nodes):
+                    # find the deepest node under the mouse
+                    hit = node.hit(event.pos)
+                    if hit != None:
+                        self.focus = hit
+                        self.set_status(str(hit))
 
                         # place node on top
-                        self.nodes.remove(node)
-                        self.nodes.append(node)
+                        hit.to_top()
                         break
                 if self.focus == None:
                     self.set_status(str(self))
@@ -321,6 +712,7 @@ class Scene:
                 for node in self.selection:
                     node.rect.move_ip(event.rel)
                     node.label_rect.move_ip(event.rel)
+                    self.moved(node)
                 self.selection_rect.move_ip(event.rel)
 
         elif event.type == MOUSEBUTTONUP:
@@ -328,7 +720,10 @@ class Scene:
             self.selecting = False
             self.moving = False
             self.selection = []
-            for node in self.nodes:
+            nodes = self.nodes
+            if self.camera != None:
+                nodes = sorted(self.query(self.selection_rect), key=lambda node: node.z)
+            for node in nodes:
                 if self.selection_surround:
                     if self.selection_rect.contains(node.rect):
                         self.selection.append(node)
@@ -342,6 +737,9 @@ class Scene:
                     self.selection_rect.union_ip(x.rect)
                 self.selection_rect.inflate_ip((4, 4))
 
+        elif event.type == VIDEORESIZE:
+            self.resize(event.size)
+
         elif event.type == DBL_CLICK_TIMER:
             pygame.time.set_timer(DBL_CLICK_TIMER, 0)
             print(self.clicks, 'clicks in', self.focus)
@@ -355,7 +753,7 @@ class Scene:
             self.clicks = 0
         
         if self.focus != None:
-            self.focus.do_event(event)
+            self.focus.do_event(self.focus.local_event(event))
 
     def next_focus(self, d=1):
         """Advance focus to next node."""
@@ -373,21 +771,62 @@ class Scene:
         for x in self.selection:
             self.nodes.remove(x)
         self.selection = []
+        self.index_dirty = True
 
     def copy(self):
         """Copies the selected objects and places them in App.selection."""
-        App.selection = self.selection
+        App.selection = list(self.selection)
 
     def paste(self):
-        """Pastes the objects from App.selection."""
-        print('paste')
-        # obj = App.focus
-        # obj2 = eval(type(obj).__name__+'()')
-        # obj2.rect = obj.rect.copy()
-        # #®obj2.__dict__.update(obj.__dict__)
-        # obj2.rect.topleft = pygame.mouse.get_pos()
-        # obj2.label_rect.bottomleft = pygame.mouse.get_pos()
-        # self.nodes.append(obj2)
+        """Pastes clones of the objects from App.selection at the mouse position."""
+        if not App.selection:
+            return
+        rect = App.selection[0].rect.unionall([x.rect for x in App.selection[1:]])
+        pos = pygame.mouse.get_pos()
+        if self.camera != None:
+            pos = self.camera.to_world(pos)
+        offset = pos[0] - rect.left, pos[1] - rect.top
+        self.selection = self.clone(App.selection, offset)
+        self.selection_rect = rect.move(offset).inflate(4, 4)
+
+    def clone(self, nodes, offset=(0, 0)):
+        """Add clones of the nodes to the scene and return them.
+        The clones share their images with the originals until one is modified."""
+        memo = {}
+        return [node.clone(offset, memo) for node in nodes]
+
+    def save(self, file, surfaces=True):
+        """Save the scene and its nodes to a snapshot file.
+        With surfaces=False the images are rendered again when loading."""
+        Snapshot(surfaces).save(self, file)
+
+    @staticmethod
+    def load(file):
+        """Load a scene from a snapshot file and make it the current scene."""
+        scene = Snapshot().load(file)
+        App.scenes.append(scene)
+        App.scene = scene
+        scene.restore()
+        scene.enter()
+        return scene
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['status_event'] = None
+        return state
+
+    def restore(self):
+        """Render the images of a loaded scene which were not saved."""
+        if self.img == None:
+            if self.file != '':
+                self.load_img(self.file)
+            else:
+                self.img = pygame.Surface(self.rect.size)
+                self.img.fill(self.bg)
+        if self.status_img == None:
+            self.create_status()
+        for node in self.nodes + self.layouts:
+            node.restore()
 
     def debug(self):
         """Print all scene/node options."""
@@ -425,6 +864,18 @@ class Node:
     resizing = False
     moving = False
 
+    # setting one of these attributes marks the node dirty
+    render_attrs = ()
+    dirty = False
+    layout = None  # the Layout which places the node
+    scene = None   # the scene the node belongs to
+    shared = False   # img and img0 are shared with a clone (copy-on-write)
+    zoom_key = None  # cache key of zoom_img
+    parent = None  # the parent node, rect is relative to the parent
+
+    # caches, which are not saved in snapshots
+    transient = ('zoom_img', 'zoom_key', 'world_rect', 'world_key')
+
     # color and size/thickness
     label = Color('red'), 14
     outline = Color('red'), 1
@@ -443,6 +894,10 @@ class Node:
         Node.options['id'] += 1 
 
     def __init__(self, **options):
+        self.scene = App.scene
+        self.children = []
+        self.world_key = None  # cache key of world_rect
+
         # update existing Node options, without adding new ones
         self.set_options(Node, options)
         self.increment_id()
@@ -450,7 +905,9 @@ class Node:
         self.calculate_pos(options)
         self.rect = Rect(*self.pos, *self.size)
         
-        App.scene.nodes.append(self)
+        self.siblings().append(self)
+        self.z = self.scene.next_z()
+        self.scene.index_dirty = True
         self.render_label()
 
         self.create_img()
@@ -458,6 +915,109 @@ class Node:
         if self.file != '':
             self.load_img()
 
+    def __setattr__(self, name, value):
+        """Set an attribute, and mark the node dirty if a visual one changes.
+        Lists and arrays can be changed in place, setting them always counts."""
+        changed = name == 'dirty' and value
+        if name in self.render_attrs:
+            old = self.__dict__.get(name, _missing)
+            changed = (isinstance(old, (list, np.ndarray)) or
+                       isinstance(value, (list, np.ndarray)) or old != value)
+        super().__setattr__(name, value)
+        if changed:
+            self.__dict__['dirty'] = True
+            (self.scene or App.scene).dirty_nodes[self] = True
+
+    def __getstate__(self):
+        """Return the state for a snapshot: the attributes without caches,
+        and only the Node options which differ from their defaults."""
+        state = self.__dict__.copy()
+        for k in self.transient:
+            state.pop(k, None)
+        for k, v in Node.options0.items():
+            if k in state and type(state[k]) == type(v) and state[k] == v:
+                del state[k]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(Node.options0)
+        self.__dict__.update(state)
+        self.world_key = None
+
+    def restore(self):
+        """Render the images of a node loaded from a snapshot without surfaces."""
+        if self.img == None:
+            self.create_img()
+            self.color_img()
+            if self.file != '':
+                self.load_img()
+            self.render()
+        for child in self.children:
+            child.restore()
+
+    def render(self):
+        """Render the node image."""
+        pass
+
+    def refresh(self):
+        """Bring the image of a dirty node up to date, called once per frame."""
+        self.render()
+
+    def clone(self, offset=(0, 0), memo=None, parent=None):
+        """Return a copy of the node and its children, placed at offset.
+        Options and state are copied, surfaces and fonts are shared."""
+        memo = {} if memo == None else memo
+        memo[id(self.parent)] = self.parent if parent == None else parent
+        memo[id(self.layout)] = None
+        memo[id(self.children)] = []
+        Node.share(self.__dict__, memo)
+
+        node = object.__new__(type(self))
+        for k, v in self.__dict__.items():
+            node.__dict__[k] = copy.deepcopy(v, memo)
+        node.id = Node.options['id']
+        node.increment_id()
+        node.rect.move_ip(offset)
+        node.label_img = None  # rendered when it is first drawn
+        node.world_key = None
+        node.shared = self.shared = True
+        if node.dirty:
+            node.scene.dirty_nodes[node] = True
+
+        node.siblings().append(node)
+        node.z = node.scene.next_z()
+        node.scene.index_dirty = True
+        for child in self.children:
+            child.clone((0, 0), memo, node)
+        return node
+
+    @staticmethod
+    def share(obj, memo):
+        """Enter the surfaces, fonts, nodes and other non-copyable values
+        reachable from obj into memo, so that deepcopy shares them."""
+        stack = [obj]
+        while stack:
+            x = stack.pop()
+            if isinstance(x, (int, float, str, type(None))) or id(x) in memo:
+                continue
+            if isinstance(x, (pygame.Surface, pygame.font.Font, Node, Scene, 
+                              mmap.mmap, types.GeneratorType)):
+                memo[id(x)] = x
+            elif isinstance(x, (list, tuple, set)):
+                stack.extend(x)
+            elif isinstance(x, dict):
+                stack.extend(x.values())
+            elif hasattr(x, '__dict__') and not isinstance(x, type):
+                stack.extend(x.__dict__.values())
+
+    def own_img(self):
+        """Copy the images shared with a clone before drawing into them."""
+        if self.shared:
+            img = self.img.copy()
+            self.img0 = img if self.img0 is self.img else self.img0.copy()
+            self.img = img
+            self.shared = False
+
     def set_options(self, cls, options):
         """Set instance options from class options."""
 
@@ -507,9 +1067,24 @@ class Node:
 
         self.img = pygame.transform.smoothscale(self.img0, self.rect.size)
 
+    def siblings(self):
+        """Return the list of nodes which contains this node."""
+        if self.parent != None:
+            return self.parent.children
+        return self.scene.nodes
+
     def calculate_pos(self, options):
         """Calculate the next node position."""
-        if self.id > 0 and 'pos' not in options: 
+        if self.parent != None and 'pos' not in options:
+            # child nodes are placed relative to their parent
+            x, y = self.gap
+            if self.parent.children:
+                last = self.parent.children[-1].rect
+                x = last.x + self.dir[0] * (last.width + self.gap[0])
+                y = last.y + self.dir[1] * (last.height + self.gap[1])
+            self.pos = x, y
+
+        elif self.id > 0 and 'pos' not in options: 
             last = App.scene.nodes[-1].rect
             x = self.pos[0] + self.dir[0] * (last.size[0] + self.gap[0])
             y = self.pos[1] + self.dir[1] * (last.size[1] + self.gap[1])
@@ -519,7 +1094,7 @@ class Node:
     def render_label(self):
         """Create and render the node label."""
         col, size = Node.label
-        font = pygame.font.Font(None, size)
+        font = App.get_font(None, size)
         self.label_img = font.render(str(self), True, col)
         self.label_rect = self.label_img.get_rect()
         self.label_rect.bottomleft = self.rect.topleft
@@ -547,9 +1122,12 @@ class Node:
                     self.rect.width += dx
                     self.rect.height += dy
                 self.rect.normalize()
+                if self.layout != None:
+                    self.layout.invalidate()
+                self.scene.moved(self)
                 #if self.file != '':
                 if isinstance(self, (Ellipse, Rectangle)):
-                    self.render()
+                    self.dirty = True
                 else:
                     self.img = pygame.transform.smoothscale(self.img0, self.rect.size)
 
@@ -557,30 +1135,112 @@ class Node:
             Node.resizing = False
             Node.moving = False
 
+    def move_to(self, pos):
+        """Move the node to the position pos."""
+        self.rect.topleft = pos
+        self.label_rect.bottomleft = pos
+        self.scene.moved(self)
+
+    def get_world_rect(self):
+        """Return the rect in screen coordinates, cached until the node or a parent moves."""
+        if self.parent == None:
+            return self.rect
+        origin = self.parent.get_world_rect().topleft
+        key = origin, tuple(self.rect)
+        if key != self.world_key:
+            self.world_key = key
+            self.world_rect = self.rect.move(origin)
+        return self.world_rect
+
+    def hit(self, pos, origin=(0, 0)):
+        """Return the deepest node of the subtree at pos, or None."""
+        rect = self.rect.move(origin)
+        if not rect.collidepoint(pos):
+            return None
+        for child in reversed(self.children):
+            node = child.hit(pos, rect.topleft)
+            if node != None:
+                return node
+        return self
+
+    def to_top(self):
+        """Place the node and its parents on top of their siblings."""
+        node = self
+        while node != None:
+            siblings = node.siblings()
+            siblings.remove(node)
+            siblings.append(node)
+            node.z = node.scene.next_z()
+            node = node.parent
+
+    def local_event(self, event):
+        """Return the event with a mouse position relative to the parent."""
+        if self.parent == None or not hasattr(event, 'pos'):
+            return event
+        x0, y0 = self.parent.get_world_rect().topleft
+        x, y = event.pos
+        return pygame.event.Event(event.type, event.dict, pos=(x-x0, y-y0))
+
     def update(self):
         pass
 
-    def draw(self):
+    def get_zoom_img(self, zoom):
+        """Return the image scaled to zoom, cached per zoom step."""
+        step = round(math.log(zoom, Camera.zoom_step))
+        key = step, id(self.img), self.img.get_size()
+        if key != self.zoom_key:
+            z = Camera.zoom_step ** step
+            w, h = self.img.get_size()
+            self.zoom_img = pygame.transform.scale(self.img, (max(1, round(w*z)), max(1, round(h*z))))
+            self.zoom_key = key
+        return self.zoom_img
+
+    def draw(self, origin=(0, 0), zoom=1):
         """Draw the node and optionally the outline, label and focus."""
+        if zoom == 1:
+            rect = self.rect.move(origin)
+            img = self.img
+        else:
+            x, y, w, h = self.rect
+            rect = Rect(origin[0] + x*zoom, origin[1] + y*zoom, w*zoom, h*zoom)
+            img = self.get_zoom_img(zoom)
         if self.visible:
-            App.screen.blit(self.img, self.rect)
+            App.screen.blit(img, rect)
         
         if App.debug & DBG_OUTLINE:
-            pygame.draw.rect(App.screen, Node.outline[0], self.rect, Node.outline[1])
+            pygame.draw.rect(App.screen, Node.outline[0], rect, Node.outline[1])
 
         if App.debug & DBG_LABELS:
-            App.screen.blit(self.label_img, self.label_rect)
+            if self.label_img == None:
+                self.render_label()
+            App.screen.blit(self.label_img, self.label_img.get_rect(bottomleft=rect.topleft))
 
         if self in App.scene.selection:
             col, d = Node.selection
-            pygame.draw.rect(App.screen, col, self.rect, d)
+            pygame.draw.rect(App.screen, col, rect, d)
     
         if self == App.scene.focus:
-            pygame.draw.rect(App.screen, Node.focus[0], self.rect, Node.focus[1])
+            pygame.draw.rect(App.screen, Node.focus[0], rect, Node.focus[1])
             if self.resizable:
                 r = Rect(0, 0, 7, 7)
-                r.bottomright = self.rect.bottomright
+                r.bottomright = rect.bottomright
                 pygame.draw.rect(App.screen, Node.focus[0], r, Node.focus[1])
+
+        if self.children:
+            self.draw_children(rect, zoom)
+
+    def draw_children(self, rect, zoom=1):
+        """Draw the children clipped to the node, skipping the hidden subtrees."""
+        clip = App.screen.get_clip()
+        area = rect.clip(clip)
+        if area.width == 0 or area.height == 0:
+            return
+        App.screen.set_clip(area)
+        for child in self.children:
+            x, y, w, h = child.rect
+            if area.colliderect((rect.x + x*zoom, rect.y + y*zoom, w*zoom, h*zoom)):
+                child.draw(rect.topleft, zoom)
+        App.screen.set_clip(clip)
     
     def double_click(self):
         App.scene.set_status(f'double-click in {self}')
@@ -593,6 +1253,145 @@ class Node:
     def __str__(self):
         return self.__class__.__name__ + str(self.id)
 
+class Layout(Node):
+    """Arrange child nodes and keep them arranged when their size changes.
+    An anchored layout is placed relative to the window (e.g. 'topright')."""
+    options = { 'spacing': (10, 10),  # space between children (x, y)
+                'padding': 0,  # space around the children
+    }
+
+    def __init__(self, *nodes, anchor=None, offset=(0, 0), **options):
+        # a layout is not drawn and does not take part in the automatic
+        # placement, so it skips Node.__init__: it takes no node id and
+        # does not move the position of the next node
+        self.scene = App.scene
+        self.id = len(self.scene.layouts)
+        self.scene.layouts.append(self)
+        self.set_options(Layout, options)
+
+        # without pos the layout starts at its first child
+        pos = options.get('pos', nodes[0].rect.topleft if nodes else (0, 0))
+        self.rect = Rect(pos, (0, 0))
+        self.label_rect = Rect(pos, (0, 0))
+        self.anchor = anchor
+        self.offset = offset
+        self.children = []
+        self.layout_dirty = True
+        self.add(*nodes)
+
+    def restore(self):
+        # the children are restored with the scene nodes
+        pass
+
+    def add(self, *nodes):
+        """Add nodes (or layouts) to the layout."""
+        for node in nodes:
+            if node.layout != None:
+                node.layout.children.remove(node)
+                node.layout.invalidate()
+            node.layout = self
+            self.children.append(node)
+        self.invalidate()
+
+    def invalidate(self):
+        """Mark the layout and its parent layouts for a new layout."""
+        layout = self
+        while layout != None and not layout.layout_dirty:
+            layout.layout_dirty = True
+            layout = layout.layout
+
+    def positions(self, sizes):
+        """Return the child positions relative to the layout, and the layout size."""
+        return [(0, 0) for size in sizes], (0, 0)
+
+    def do_layout(self):
+        """Place the children, laying out again only the dirty sub-layouts."""
+        for child in self.children:
+            if isinstance(child, Layout) and child.layout_dirty:
+                child.do_layout()
+
+        p = self.padding
+        pos, (w, h) = self.positions([child.rect.size for child in self.children])
+        self.rect.size = w + 2*p, h + 2*p
+        if self.anchor != None and self.layout == None:
+            self.place()
+
+        x0, y0 = self.rect.left + p, self.rect.top + p
+        for child, (x, y) in zip(self.children, pos):
+            child.move_to((x0 + x, y0 + y))
+        self.layout_dirty = False
+
+    def place(self):
+        """Place the layout at its anchor in the window. A point anchor
+        ('topright', 'center', ...) is moved by the offset, a side anchor
+        ('top', 'left', ...) only across the side."""
+        dx, dy = self.offset
+        value = getattr(self.scene.rect, self.anchor)
+        if self.anchor in ('left', 'right', 'centerx', 'x'):
+            value += dx
+        elif self.anchor in ('top', 'bottom', 'centery', 'y'):
+            value += dy
+        else:
+            value = value[0] + dx, value[1] + dy
+        setattr(self.rect, self.anchor, value)
+
+    def move_to(self, pos):
+        """Move the layout and its children, without laying them out again."""
+        dx = pos[0] - self.rect.left
+        dy = pos[1] - self.rect.top
+        super().move_to(pos)
+        for child in self.children:
+            child.move_to((child.rect.left + dx, child.rect.top + dy))
+
+class Row(Layout):
+    """Place the children from left to right."""
+
+    def positions(self, sizes):
+        pos = []
+        x = 0
+        for w, h in sizes:
+            pos.append((x, 0))
+            x += w + self.spacing[0]
+        x = max(0, x - self.spacing[0])
+        return pos, (x, max([h for w, h in sizes], default=0))
+
+class Column(Layout):
+    """Place the children from top to bottom."""
+
+    def positions(self, sizes):
+        pos = []
+        y = 0
+        for w, h in sizes:
+            pos.append((0, y))
+            y += h + self.spacing[1]
+        y = max(0, y - self.spacing[1])
+        return pos, (max([w for w, h in sizes], default=0), y)
+
+class Grid(Layout):
+    """Place the children in a grid with a number of columns."""
+    options = { 'cols': 2 }
+
+    def __init__(self, *nodes, **options):
+        self.set_options(Grid, options)
+        super().__init__(*nodes, **options)
+
+    def positions(self, sizes):
+        cols = self.cols
+        rows = (len(sizes) + cols - 1) // cols
+        widths = [0] * cols
+        heights = [0] * rows
+        for k, (w, h) in enumerate(sizes):
+            widths[k % cols] = max(widths[k % cols], w)
+            heights[k // cols] = max(heights[k // cols], h)
+
+        sx, sy = self.spacing
+        xs = [sum(widths[:j]) + j*sx for j in range(cols)]
+        ys = [sum(heights[:i]) + i*sy for i in range(rows)]
+        pos = [(xs[k % cols], ys[k // cols]) for k in range(len(sizes))]
+        w = xs[-1] + widths[-1] if sizes else 0
+        h = ys[-1] + heights[-1] if sizes else 0
+        return pos, (w, h)
+
 class TextObj:
     """Create a text surface image."""
     options = { 'fontname': None,
@@ -624,10 +1423,13 @@ class TextObj:
 
     def set_font(self):
         """Set the font and its properties."""
-        self.font = pygame.font.Font(self.fontname, self.fontsize)
-        self.font.set_bold(self.bold)
-        self.font.set_italic(self.italic)
-        self.font.set_underline(self.underline)
+        self.font = App.get_font(self.fontname, self.fontsize,
+                                 self.bold, self.italic, self.underline)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.img == None:
+            self.render_text()
 
     def render_text(self):
         """Render the text into an image."""
@@ -659,6 +1461,11 @@ class Text(Node):
             self.rect.size = self.txt.rect.size
             self.img = self.txt.img
 
+    def restore(self):
+        if self.img == None:
+            self.img = self.txt.img
+        super().restore()
+
 class TextLines(Node):
     options = {
         'interline': 1,
@@ -680,9 +1487,19 @@ class TextLines(Node):
             self.img.fill(bg)
         self.render()
 
+    def restore(self):
+        if self.img == None:
+            self.img = pygame.Surface(self.rect.size, flags=SRCALPHA)
+            self.render()
+        super().restore()
+
     def render(self):
+        self.own_img()
+        # render each line with the font and alignment of the first line
+        txt = copy.copy(self.line0)
         for i, line in enumerate(self.lines):
-            txt = TextObj(line)
+            txt.text = line
+            txt.render_text()
             y = self.interline * self.h * i
             self.img.blit(txt.img, (0, y))
 
@@ -699,6 +1516,11 @@ class EditableTextObj(TextObj):
         self.cmd = cmd
         self.set_text(text)
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.img == None:
+            self.render()
+
     def set_text(self, text):
         self.text = text
         self.i = len(self.text)
@@ -785,7 +1607,8 @@ class EditableTextObj(TextObj):
         self.i2 = 0
 
     def do_event(self, event):
-        """Move cursor, handle selection, add/backspace text, copy/paste."""
+        """Move cursor, handle selection, add/backspace text, copy/paste.
+        The text is not rendered again, call render() afterwards."""
         if event.type == KEYDOWN:
             if event.key == K_RETURN:
                 try:
@@ -823,8 +1646,6 @@ class EditableTextObj(TextObj):
             elif event.key == K_a and event.mod & KMOD_META:
                 self.select_all()
 
-            self.render()
-
         elif event.type == MOUSEBUTTONDOWN:
             pos = event.pos[0] - self.rect.left - self.x
             if pos < 3:
@@ -841,8 +1662,6 @@ class EditableTextObj(TextObj):
 
             self.i = self.get_char_index(pos)
 
-        self.render()
-
     def render(self):
         """Render cursor, selection and text to an image."""
         h = self.font.get_height()
@@ -880,32 +1699,47 @@ class EditableText(Node):
         self.img = self.txt.img
         self.rect.height = self.txt.font.get_height()
 
+    def restore(self):
+        if self.img == None:
+            self.img = self.txt.img
+        super().restore()
+
     def do_event(self, event):
+        state = self.txt.text, self.txt.i, self.txt.i2
         self.txt.do_event(event)
+        if (self.txt.text, self.txt.i, self.txt.i2) != state:
+            self.dirty = True
+
+    def render(self):
+        self.txt.render()
         self.img = self.txt.img
 
-    def draw(self):
+    def draw(self, origin=(0, 0), zoom=1):
         # self.txt.draw()
-        Node.draw(self)
+        Node.draw(self, origin, zoom)
         if self == App.scene.focus:
             t = pygame.time.get_ticks()
             interval, on_time = EditableTextObj.blink_rate
             if (t % interval) < on_time:
                 col, d = EditableTextObj.cursor_style
-                rect = self.txt.cursor_rect.move(self.rect.topleft)
-                rect.move_ip(self.txt.x, 0)
+                x, y, w, h = self.txt.cursor_rect.move(self.txt.x, 0)
+                x0, y0 = origin[0] + self.rect.x*zoom, origin[1] + self.rect.y*zoom
+                rect = Rect(x0 + x*zoom, y0 + y*zoom, max(1, w*zoom), h*zoom)
                 pygame.draw.rect(App.screen, Color('blue'), rect)
 
 
     def double_click(self):
         """Select the current word."""
         self.txt.select_word()
+        self.dirty = True
 
     def triple_click(self):
         self.txt.select_all()
+        self.dirty = True
 
 class Button(Node):
     """Create a button object with command.""" 
+    render_attrs = ('state',)
     options = { 'border': 2,
                 'bg': Color('gray'),
                 'size': (160, 40),
@@ -923,6 +1757,7 @@ class Button(Node):
         self.render()
 
     def render(self):
+        self.own_img()
         self.img.fill(Color('lightblue'))
         self.label.render_text()
         w, h = self.rect.size
@@ -942,7 +1777,6 @@ class Button(Node):
                 self.label.text = 'ON'
             else:
                 self.label.text = 'OFF'
-            self.render()
 
 class Toggle:
     """Add toggle button behavior."""
@@ -953,7 +1787,6 @@ class Toggle:
             exec(self.cmd)
         except:
             print('cmd error') 
-        self.render()
 
     def do_event(self, event):
         if event.type == MOUSEBUTTONDOWN:
@@ -964,6 +1797,7 @@ class Toggle:
                 self.switch_state()
 
 class Checkbox(Toggle, Node):
+    render_attrs = ('state',)
     options = {
         'state': False,
         'style': (Color('blue'), 2),
@@ -982,11 +1816,19 @@ class Checkbox(Toggle, Node):
         self.state = False
         self.render()
 
+    def restore(self):
+        if self.img == None:
+            self.img = pygame.Surface(self.rect.size, flags=SRCALPHA)
+            self.render()
+        super().restore()
+
     def render(self):
         col, d = self.style
         w, h = self.label.img.get_size()
         a = self.label.font.get_ascent()
 
+        self.own_img()
+        self.img.fill((0, 0, 0, 0))
         self.img.blit(self.label.img, (h, 0))
         pygame.draw.rect(self.img, (0, 0, 0, 0), Rect(0, 0, a, a))
         pygame.draw.rect(self.img, Color('black'), Rect(0, 0, a, a), d)
@@ -1001,6 +1843,8 @@ class Radiobutton(Checkbox):
         w, h = self.label.img.get_size()
         a = self.label.font.get_ascent()
 
+        self.own_img()
+        self.img.fill((0, 0, 0, 0))
         self.img.blit(self.label.img, (h, 0))
 
         pygame.draw.rect(self.img, (0, 0, 0, 0), Rect(0, 0, a, a))
@@ -1009,8 +1853,302 @@ class Radiobutton(Checkbox):
             pygame.draw.ellipse(self.img, Color('black'), Rect(3, 3, a-6, a-6), 0)
 
 
+class Selection:
+    """Store selected indices as sorted, disjoint ranges [start, stop)."""
+
+    def __init__(self, n):
+        self.n = n
+        self.starts = []
+        self.stops = []
+
+    def __contains__(self, i):
+        k = bisect.bisect_right(self.starts, i) - 1
+        return k >= 0 and i < self.stops[k]
+
+    def __getitem__(self, i):
+        return 1 if i in self else 0
+
+    def __len__(self):
+        return sum(b - a for a, b in self.ranges())
+
+    def __iter__(self):
+        for a, b in self.ranges():
+            yield from range(a, b)
+
+    def ranges(self):
+        """Return the list of selected ranges."""
+        return list(zip(self.starts, self.stops))
+
+    def clear(self):
+        self.starts = []
+        self.stops = []
+
+    def select_all(self):
+        self.starts = [0]
+        self.stops = [self.n]
+
+    def add(self, a, b=None):
+        """Select the range [a, b), merging with touching ranges."""
+        b = a + 1 if b == None else b
+        lo = bisect.bisect_left(self.stops, a)
+        hi = bisect.bisect_right(self.starts, b)
+        if lo < hi:
+            a = min(a, self.starts[lo])
+            b = max(b, self.stops[hi-1])
+        self.starts[lo:hi] = [a]
+        self.stops[lo:hi] = [b]
+
+    def remove(self, a, b=None):
+        """Deselect the range [a, b), splitting the ranges it overlaps."""
+        b = a + 1 if b == None else b
+        lo = bisect.bisect_right(self.stops, a)
+        hi = bisect.bisect_left(self.starts, b)
+        if lo >= hi:
+            return
+        starts, stops = [], []
+        if self.starts[lo] < a:
+            starts.append(self.starts[lo])
+            stops.append(a)
+        if self.stops[hi-1] > b:
+            starts.append(b)
+            stops.append(self.stops[hi-1])
+        self.starts[lo:hi] = starts
+        self.stops[lo:hi] = stops
+
+    def toggle(self, i):
+        if i in self:
+            self.remove(i)
+        else:
+            self.add(i)
+
+class SearchIndex:
+    """Sorted index of the lowercase item strings, for prefix search."""
+
+    def __init__(self, items):
+        pairs = sorted((str(x).lower(), i) for i, x in enumerate(items))
+        self.keys = [k for k, i in pairs]
+        self.index = [i for k, i in pairs]
+        self.ranks = None  # item index -> position in the index, built when needed
+
+    def match(self, prefix):
+        """Return the range (lo, hi) of the index entries starting with prefix."""
+        prefix = prefix.lower()
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + '\U0010ffff', lo)
+        return lo, hi
+
+    def find(self, prefix):
+        """Return the index of the first item starting with prefix, or None."""
+        lo, hi = self.match(prefix)
+        return self.index[lo] if lo < hi else None
+
+    def rank(self, i):
+        """Return the position of item i in the index."""
+        if self.ranks == None:
+            self.ranks = [0] * len(self.index)
+            for k, j in enumerate(self.index):
+                self.ranks[j] = k
+        return self.ranks[i]
+
+    def add(self, i, item):
+        """Add item i to the index."""
+        self.ranks = None
+        k = bisect.bisect_left(self.keys, str(item).lower())
+        self.keys.insert(k, str(item).lower())
+        self.index.insert(k, i)
+
+    def discard(self, i, item):
+        """Remove item i from the index."""
+        self.ranks = None
+        key = str(item).lower()
+        k = bisect.bisect_left(self.keys, key)
+        while k < len(self.keys) and self.keys[k] == key:
+            if self.index[k] == i:
+                del self.keys[k]
+                del self.index[k]
+                return
+            k += 1
+
+class IndexView:
+    """Show the items of an index range, without copying the item list."""
+
+    def __init__(self, items, index, lo, hi):
+        self.items = items
+        self.index = index  # a SearchIndex
+        self.lo = lo
+        self.hi = hi
+
+    def __len__(self):
+        return self.hi - self.lo
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        return self.items[self.index.index[self.lo + i]]
+
+    def source_index(self, i):
+        """Return the index in the item list of the shown item i."""
+        return self.index.index[self.lo + i]
+
+    def view_index(self, i):
+        """Return the shown index of item i of the item list, or None."""
+        k = self.index.rank(i)
+        return k - self.lo if self.lo <= k < self.hi else None
+
+class PagedList:
+    """Give list access to a data source, fetching the items in pages.
+    A data source has a length and a method fetch(start, stop)."""
+    page_size = 256
+    cache_pages = 16
+
+    def __init__(self, source):
+        self.source = source
+        self.pages = collections.OrderedDict()  # page number -> items
+
+    def __len__(self):
+        return len(self.source)
+
+    @property
+    def more(self):
+        """True while the source can still grow."""
+        return getattr(self.source, 'more', False)
+
+    def load(self, stop):
+        """Let a growing source read up to item stop."""
+        self.source.fetch(len(self.source), stop)
+        # cached pages which were short can be longer now
+        for k in [k for k, page in self.pages.items() if len(page) < PagedList.page_size]:
+            del self.pages[k]
+
+    def get_page(self, k):
+        """Return page k, from the cache or fetched from the source."""
+        if k in self.pages:
+            self.pages.move_to_end(k)
+        else:
+            if len(self.pages) >= PagedList.cache_pages:
+                self.pages.popitem(last=False)
+            n = PagedList.page_size
+            self.pages[k] = self.source.fetch(k * n, (k+1) * n)
+        return self.pages[k]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        page = self.get_page(i // PagedList.page_size)
+        k = i % PagedList.page_size
+        if not 0 <= k < len(page):
+            raise IndexError('PagedList index out of range')
+        return page[k]
+
+    def __iter__(self):
+        for k in range(0, len(self), PagedList.page_size):
+            yield from self.source.fetch(k, k + PagedList.page_size)
+
+class LineFile:
+    """Data source for the lines of a text file, which is memory-mapped.
+    Only every step-th line offset is stored in the line index."""
+    step = 64
+
+    def __init__(self, path, encoding='utf-8'):
+        self.path = path
+        self.encoding = encoding
+        size = self.open()
+        self.index_lines(size)
+
+    def open(self):
+        """Open and memory-map the file, return its size."""
+        self.file = open(self.path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        return size
+
+    def __getstate__(self):
+        # the line index is saved, the file is mapped again when loading
+        state = self.__dict__.copy()
+        del state['file'], state['mm']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.open()
+
+    def index_lines(self, size, chunk=1<<24):
+        """Find the line offsets chunk by chunk with NumPy."""
+        offsets = [np.zeros(1, dtype=np.int64)]
+        n = 0  # number of line starts found
+        for a in range(0, size, chunk):
+            buf = np.frombuffer(self.mm, dtype=np.uint8, count=min(chunk, size-a), offset=a)
+            starts = np.flatnonzero(buf == 10) + a + 1
+            k = (-n-1) % LineFile.step  # first line number which is a multiple of step
+            offsets.append(starts[k::LineFile.step])
+            n += len(starts)
+        starts = np.concatenate(offsets)
+        # the file may end without a final newline
+        if size > 0 and self.mm[size-1:size] != b'\n':
+            n += 1
+        self.n = n
+        self.offsets = starts[(np.arange(len(starts)) * LineFile.step) < n] if n else starts[:0]
+
+    def __len__(self):
+        return self.n
+
+    def fetch(self, start, stop):
+        """Return the lines [start, stop)."""
+        stop = min(stop, self.n)
+        if start >= stop:
+            return []
+        pos = int(self.offsets[start // LineFile.step])
+        for _ in range(start % LineFile.step):
+            pos = self.mm.find(b'\n', pos) + 1
+        lines = []
+        for _ in range(stop - start):
+            end = self.mm.find(b'\n', pos)
+            if end < 0:
+                end = len(self.mm)
+            lines.append(self.mm[pos:end].decode(self.encoding, 'replace').rstrip('\r'))
+            pos = end + 1
+        return lines
+
+class GeneratorSource:
+    """Data source for a generator, read as far as the items are fetched.
+    The length counts the items read so far, more is True until the
+    generator is exhausted."""
+
+    def __init__(self, gen):
+        self.gen = iter(gen)
+        self.items = []
+        self.done = False
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def more(self):
+        return not self.done
+
+    def __deepcopy__(self, memo):
+        """Copy the items read so far and split the generator with tee,
+        so that the copy and the original both read all the items."""
+        self.gen, gen = itertools.tee(self.gen)
+        source = object.__new__(GeneratorSource)
+        source.gen = gen
+        source.items = list(self.items)
+        source.done = self.done
+        return source
+
+    def fetch(self, start, stop):
+        while not self.done and len(self.items) < stop:
+            try:
+                self.items.append(next(self.gen))
+            except StopIteration:
+                self.done = True
+        return self.items[start:stop]
+
 class ListBox(Node):
     """Show a list of text items."""
+    render_attrs = ('items',)
 
     options = { 'm': 10,        # listbox height
                 'width': 100,   # in pixels
@@ -1020,63 +2158,272 @@ class ListBox(Node):
                 'style': (Color('black'), Color('white')),     # font color, background color
                 'sel_style': (Color('white'), Color('blue')),  # font color, background color
                 'fontsize': 24,
+                'filter': False,  # show only the items matching the typed prefix
     }
+    cache_size = 1000  # maximum number of cached item images
+    search_timeout = 1000  # ms between keys of the same type-ahead prefix
+    search_pages = 16      # pages read by a type-ahead search in a paged source
+    transient = Node.transient + ('item_imgs',)
+    items_shared = False  # the items and search index are shared with a clone
 
     def __init__(self, items, i=0, **options):
         super().__init__(**options)
         self.set_options(ListBox, options)
 
-        self.set_list(items)
-        self.font = pygame.font.Font(None, self.fontsize)
+        self.font = App.get_font(None, self.fontsize)
         self.h = self.font.size('fg')[1]
-        self.render()
+        self.set_list(items)
+
+    def restore(self):
+        self.item_imgs = {}
+        if self.img == None:
+            self.render()
+        super().restore()
+
+    def clone(self, offset=(0, 0), memo=None, parent=None):
+        """Return a copy which shares the items and the search index.
+        A data source is always shared, a list is copied before it changes."""
+        memo = {} if memo == None else memo
+        for x in (self.all_items, self.items, self.index):
+            memo[id(x)] = x
+        node = super().clone(offset, memo, parent)
+        node.items_shared = self.items_shared = True
+        return node
+
+    def own_items(self):
+        """Copy the item list and search index shared with a clone before changing them."""
+        if not self.items_shared or isinstance(self.all_items, PagedList):
+            return
+        view = self.items
+        self.all_items = list(self.all_items)
+        if self.index != None:
+            self.index = copy.deepcopy(self.index)
+        if isinstance(view, IndexView):
+            self.items = IndexView(self.all_items, self.index, view.lo, view.hi)
+        else:
+            self.items = self.all_items
+        self.items_shared = False
 
     def set_list(self, items):
-        """Set items and selection list."""
+        """Set items (a list or a data source) and reset the type-ahead search."""
+        if hasattr(items, 'fetch'):
+            items = PagedList(items)
+        self.all_items = items
+        self.index = None  # built at the first search
+        self.kept = []  # selected items of all_items, while filtering
+        self.kept_cursor = None  # cursor item of all_items
+        self.prefix = ''
+        self.t_key = 0
+        self.show(items)
+
+    def show(self, items):
+        """Display items (the list or a filtered view) and reset the selection."""
         self.i = 0
         self.i0 = 0     # first ListBox item
         self.i2 = 0     # cursor
         self.items = items
         self.n = len(items)
-        self.sel = [0] * self.n
-        
+        self.sel = Selection(self.n)
+        self.anchor = 0  # start of a shift-click range
+        self.item_imgs = {}  # (index, selected) -> item image
+        self.load(self.m)
+        self.render()
+
+    def load(self, stop):
+        """Read a growing data source up to item stop, if it can grow."""
+        if stop > self.n and getattr(self.items, 'more', False):
+            self.items.load(stop)
+            self.sync()
+
+    def sync(self):
+        """Follow the length of a data source which grew or shrank."""
+        n = len(self.items)
+        if n == self.n:
+            return
+        if n < self.n:
+            self.sel.remove(n, self.n)
+            self.item_imgs = {}
+        self.n = self.sel.n = n
+        self.i0 = max(0, min(self.i0, n - self.m))
+        self.i = max(0, min(self.i, n - 1))
+
+    def get_index(self):
+        """Return the search index, built once per list.
+        A paged source is not indexed, as this would read all of it."""
+        if self.index == None and not isinstance(self.all_items, PagedList):
+            self.index = SearchIndex(self.all_items)
+        return self.index
+
+    def scan(self, prefix):
+        """Return the first item from the cursor on which starts with prefix,
+        reading at most search_pages pages, or None."""
+        prefix = prefix.lower()
+        self.load(self.i + ListBox.search_pages * PagedList.page_size)
+        stop = min(self.n, self.i + ListBox.search_pages * PagedList.page_size)
+        for i in range(self.i, stop):
+            if str(self.items[i]).lower().startswith(prefix):
+                return i
+        return None
+
+    def search(self, prefix):
+        """Jump to the first item starting with prefix, or filter the list."""
+        self.prefix = prefix
+        index = self.get_index()
+        if index == None:
+            i = self.scan(prefix)
+        elif self.filter:
+            items = self.all_items
+            if prefix != '':
+                items = IndexView(items, index, *index.match(prefix))
+            self.filter_items(items)
+            return
+        else:
+            i = index.find(prefix)
+        if i != None:
+            self.goto(i)
+
+    def source_index(self, i):
+        """Return the index in all_items of the shown item i."""
+        return i if self.items is self.all_items else self.items.source_index(i)
+
+    def view_index(self, i):
+        """Return the shown index of item i of all_items, or None."""
+        return i if self.items is self.all_items else self.items.view_index(i)
+
+    def filter_items(self, items):
+        """Show a filtered view, the selected items stay selected while hidden."""
+        hidden = [i for i in self.kept if self.view_index(i) == None]
+        self.kept = hidden + [self.source_index(i) for i in self.sel]
+        self.show(items)
+        for i in self.kept:
+            k = self.view_index(i)
+            if k != None:
+                self.sel.add(k)
+        k = None if self.kept_cursor == None else self.view_index(self.kept_cursor)
+        if k != None:
+            self.i = self.anchor = k
+            self.item = self.items[k]
+            self.scroll_to(k)
+
+    def type_ahead(self, event):
+        """Add the typed character to the search prefix."""
+        t = pygame.time.get_ticks()
+        prefix = self.prefix if t - self.t_key < ListBox.search_timeout else ''
+        self.t_key = t
+        if event.key == K_BACKSPACE:
+            self.search(prefix[:-1])
+        else:
+            self.search(prefix + event.unicode)
+
+    def append(self, item):
+        """Append an item and keep the search index up to date."""
+        self.own_items()
+        self.all_items.append(item)
+        if self.index != None:
+            self.index.add(len(self.all_items)-1, item)
+        if self.items is self.all_items:
+            self.n += 1
+            self.sel.n += 1
+            self.render()
+
+    def set_item(self, i, item):
+        """Replace item i and keep the search index up to date."""
+        self.own_items()
+        if self.index != None:
+            self.index.discard(i, self.all_items[i])
+            self.index.add(i, item)
+        self.all_items[i] = item
+        if self.items is self.all_items:
+            self.item_imgs.pop((i, False), None)
+            self.item_imgs.pop((i, True), None)
+            self.render()
+
+    def render_item(self, i):
+        """Return the image of item i, rendered once per selection state."""
+        key = i, i in self.sel
+        if key not in self.item_imgs:
+            if len(self.item_imgs) >= ListBox.cache_size:
+                self.item_imgs.clear()
+            fg, bg = self.sel_style if key[1] else self.style
+            w0 = self.width
+            img = pygame.Surface((w0, self.h))
+            img.fill(bg)
+            text = self.font.render(str(self.items[i]), True, fg)
+            w = text.get_width()
+            x = (0, (w0-w)//2, w0-w)[self.align]
+            img.blit(text, (x, 0))
+            self.item_imgs[key] = img
+        return self.item_imgs[key]
+
+    def get_view(self):
+        """Return the first visible item and the selection of the visible items."""
+        i0 = self.i0
+        return i0, [i in self.sel for i in range(i0, min(i0 + self.m, self.n))]
+
     def render(self):
-        w0 = self.width
+        """Render all visible items."""
+        self.sync()
         fg, bg = self.style
-
-        self.img0 = pygame.Surface((w0, self.m * self.h))
+        self.img0 = pygame.Surface((self.width, self.m * self.h))
         self.img0.fill(bg)
         self.rect.size = self.img0.get_size()
-        
-        for i in range(min(self.m, self.n)):
-            if self.sel[self.i0 + i]:
-                fg, bg = self.sel_style
-            else:
-                fg, bg = self.style
 
-            text = self.font.render(self.items[self.i0 + i], True, fg)
-            w, h = text.get_size()
-            x = (0, (w0-w)//2, w0-w)[self.align]
+        self.view = self.get_view()
+        for k in range(len(self.view[1])):
+            self.img0.blit(self.render_item(self.i0 + k), (0, k * self.h))
+        self.img = self.img0
+
+    def refresh(self):
+        """Scroll the image and render only the changed or newly exposed items."""
+        # a data source can grow or shrink while it is shown
+        self.sync()
+        self.own_img()
+        i0, sel = self.view
+        self.view = self.get_view()
+        d = self.i0 - i0
+        if (d, sel) == (0, self.view[1]):
+            return
+        if abs(d) >= self.m:
+            self.render()
+            return
 
-            rect = Rect(0, i * self.h, w0, h)
-            self.img0.fill(bg, rect)
-            self.img0.blit(text, (x, i*self.h))
-        self.img = self.img0.copy()
+        self.img0.scroll(0, -d * self.h)
+        for k, state in enumerate(self.view[1]):
+            k0 = k + d  # row of this item before scrolling
+            if not 0 <= k0 < len(sel) or sel[k0] != state:
+                self.img0.blit(self.render_item(self.i0 + k), (0, k * self.h))
 
     def scroll(self, d):
         """Scroll listbox up and down."""
         i0 = self.i0
+        self.load(i0 + d + self.m)
         n = max(0, self.n - self.m)
         self.i0 = max(0, min(i0+d, n))
 
+    def scroll_to(self, i):
+        """Scroll item i into view."""
+        if i < self.i0:
+            self.i0 = i
+        elif i >= self.i0 + self.m:
+            self.i0 = i - self.m + 1
+
+    def goto(self, i):
+        """Scroll item i into view and make it the only selected item."""
+        self.scroll_to(i)
+        self.select(i, 0)
+
     def move_cursor(self, d):
         """Move the active cell up or down."""
         mod = pygame.key.get_mods()
         i, n = self.i, self.n
+        if n == 0:
+            return
 
         # when ALT pressed move a screenful
         if mod & KMOD_ALT:
             d *= self.m-1
+        self.load(i + d + 1)
+        n = self.n
 
         if self.wrap:
             i = (i + d) % n
@@ -1102,28 +2449,44 @@ class ListBox(Node):
         # self.sel[i] = 1
         self.select(i)
 
-    def select(self, i):
-        # Select item i
-        mod = pygame.key.get_mods()
+    def select(self, i, mod=None):
+        """Select item i, the modifier keys (by default the pressed ones)
+        extend (shift) or toggle (meta) a multiple selection."""
+        if mod == None:
+            mod = pygame.key.get_mods()
+        if not 0 <= i < self.n:
+            return
         self.i = i
         self.item = self.items[i]
+        self.kept_cursor = self.source_index(i)
 
         if self.mode == 1:
-            self.select_all(0)
-            self.sel[i] = 1
+            self.sel.clear()
+            self.sel.add(i)
         elif self.mode == 2:
             if mod & KMOD_SHIFT:
-                self.sel[i] = 1
+                # extend the selection from the anchor to i
+                a, b = sorted((self.anchor, i))
+                self.sel.add(a, b+1)
+                return
             elif mod & KMOD_META:
-                self.sel[i] = 1 - self.sel[i]
+                self.sel.toggle(i)
             else:
-                self.select_all(0)
-                self.sel[i] = 1
-            
-        
+                self.sel.clear()
+                self.sel.add(i)
+        self.anchor = i
+
     def select_all(self, val):
-         for i in range(self.n):
-            self.sel[i] = val
+        """Select (1) or deselect (0) all items."""
+        if val:
+            self.sel.select_all()
+        else:
+            self.sel.clear()
+
+    def get_selection(self):
+        """Iterate over the selected items."""
+        for a, b in self.sel.ranges():
+            yield from self.items[a:b]
 
     def do_event(self, event):
         if event.type == MOUSEBUTTONDOWN:
@@ -1148,11 +2511,15 @@ class ListBox(Node):
                 self.move_cursor(-1)
             elif event.key == K_RETURN:
                 exec(self.cmd)
-            elif event.key == K_a:
-                if event.mod & KMOD_META and self.mode == 2:
+            elif event.key == K_a and event.mod & KMOD_META:
+                if self.mode == 2:
                     self.select_all(1)
-                   
-        self.render()
+            elif event.mod & (KMOD_META + KMOD_CTRL):
+                pass
+            elif event.key == K_BACKSPACE or event.unicode.isprintable() and event.unicode != '':
+                self.type_ahead(event)
+
+        self.dirty = True
 
 class ListMenu:
     """Display a drop-down menu."""
@@ -1185,21 +2552,20 @@ class SliderObj:
         self.img = pygame.Surface(self.size, flags=SRCALPHA)
         self.rect = self.img.get_rect()
 
-        self.font = pygame.font.Font(None, 18)
+        self.font = App.get_font(None, 18)
         self.render()
 
-    def render(self):
+    def render_track(self):
+        """Render the static part: the x0 and x1 labels and the track line."""
         w, h = self.size
         col, col2, d, d2 = self.slider_style
         w0, h0 = self.slider_size
 
         img_x0 = self.font.render(str(self.x0), True, col)
         img_x1 = self.font.render(str(self.x1), True, col)
-        img_x  = self.font.render(f'{self.x:.1f}', True, col)
-        
+
         rect_x0 = img_x0.get_rect()
         rect_x1 = img_x1.get_rect()
-        rect_x = img_x.get_rect()
 
         if self.orientation == 0:
             rect_x0.bottomleft = (0, h)
@@ -1211,11 +2577,46 @@ class SliderObj:
         else:
             rect_x1.topleft = 0, 0//2
 
+        self.track = pygame.Surface(self.size, flags=SRCALPHA)
+        self.track.blit(img_x0, rect_x0)
+        self.track.blit(img_x1, rect_x1)
+
         if self.orientation == 0:
-            rect_x.midbottom = w//2, h
+            p0 = 0, h0//2
+            p1 = w, h0//2
         else:
-            rect_x.midleft = 0, h//2
-        
+            p0 = w-h0//2, 0
+            p1 = w-h0//2, h
+
+        pygame.draw.line(self.track, col, p0, p1, d)
+
+    def render(self):
+        """Render the whole slider from the cached track."""
+        self.render_track()
+        self.img.fill((0, 0, 0, 0))
+        self.img.blit(self.track, (0, 0))
+        self.slider_rect = Rect(0, 0, 0, 0)
+        self.rect_x = Rect(0, 0, 0, 0)
+        self.render_thumb()
+
+    def render_thumb(self):
+        """Restore the track under the old thumb and value, and draw the new ones."""
+        w, h = self.size
+        col, col2, d, d2 = self.slider_style
+        w0, h0 = self.slider_size
+
+        for rect in (self.slider_rect, self.rect_x):
+            self.img.fill((0, 0, 0, 0), rect)
+            self.img.blit(self.track, rect, rect)
+
+        img_x  = self.font.render(f'{self.x:.1f}', True, col)
+        self.rect_x = img_x.get_rect()
+
+        if self.orientation == 0:
+            self.rect_x.midbottom = w//2, h
+        else:
+            self.rect_x.midleft = 0, h//2
+
         if self.orientation == 0:
             self.slider_rect = Rect(0, 0, w0, h0)
         else:
@@ -1226,19 +2627,7 @@ class SliderObj:
         else:
             self.slider_rect.topright = w, (self.x1-self.x) / (self.x1-self.x0) * (h-w0)
 
-        self.img.fill((0, 0, 0, 0))
-        self.img.blit(img_x0, rect_x0)
-        self.img.blit(img_x1, rect_x1)
-        self.img.blit(img_x, rect_x)
-        
-        if self.orientation == 0:
-            p0 = 0, h0//2
-            p1 = w, h0//2
-        else:
-            p0 = w-h0//2, 0
-            p1 = w-h0//2, h
-
-        pygame.draw.line(self.img, col, p0, p1, d)
+        self.img.blit(img_x, self.rect_x)
 
         if self.slider_type == 0:
             pygame.draw.rect(self.img, col2, self.slider_rect)
@@ -1246,7 +2635,12 @@ class SliderObj:
         else:
             pygame.draw.ellipse(self.img, col2, self.slider_rect)
             pygame.draw.ellipse(self.img, col, self.slider_rect, d2)
+        self.changed = False
 
+    def update(self):
+        """Redraw the thumb at most once per frame."""
+        if self.changed:
+            self.render_thumb()
 
     def do_event(self, event):
         keys = {K_DOWN:-1, K_LEFT:-1, K_UP:1, K_RIGHT:1}
@@ -1258,7 +2652,7 @@ class SliderObj:
                 if event.mod & KMOD_META:
                     dx *= 100
                 self.x = max(self.x0, min(self.x + dx, self.x1))
-                self.render()
+                self.changed = True
 
         if event.type == MOUSEMOTION and event.buttons[0] == 1:
             dx, dy = event.rel
@@ -1269,7 +2663,7 @@ class SliderObj:
             else:
                 self.x += (-dy/h)*x
             self.x = max(self.x0, min(self.x, self.x1))
-            self.render()
+            self.changed = True
 
 class Slider(Node):
     def __init__(self, **options):
@@ -1278,10 +2672,25 @@ class Slider(Node):
         self.slider.rect = self.rect
         self.img = self.slider.img
 
+    def restore(self):
+        if self.img == None:
+            self.slider.img = pygame.Surface(self.slider.size, flags=SRCALPHA)
+            self.img = self.slider.img
+            self.slider.render()
+        super().restore()
+
     def do_event(self, event):
         self.slider.do_event(event)
+        if self.slider.changed:
+            self.dirty = True
+
+    def refresh(self):
+        self.own_img()
+        self.slider.img = self.img
+        self.slider.update()
 
 class NumInput(EditableText):
+    render_attrs = ('val',)
     options = { 'min': 0, 
                 'max': 100,
                 'inc': 1,
@@ -1299,9 +2708,6 @@ class NumInput(EditableText):
         except:
             val = self.min
 
-        self.val = max(self.min, min(val, self.max))
-        self.txt.set_text(str(self.val))
-
         if event.type == KEYDOWN:
             keys = {K_DOWN:-1, K_UP:1}
             if event.key in keys:
@@ -1310,13 +2716,23 @@ class NumInput(EditableText):
                     inc *= 10
                 if event.mod & KMOD_META:
                     inc *= 100
-                self.val = max(self.min, min(self.val + inc, self.max))
-                
-                self.txt.set_text(str(self.val))
+                val = self.val + inc
+
+        self.val = max(self.min, min(val, self.max))
+
+    def render(self):
+        # keep the cursor while the text shows the value
+        text = str(self.val)
+        if self.txt.text != text:
+            self.txt.set_text(text)
+        else:
+            self.txt.render()
+        self.img = self.txt.img
 
 
 class Spinbox(Node):
     """Input a number."""
+    render_attrs = ('val',)
     options = { 'min': 0,
                 'max': 10,
                 'inc': 1,
@@ -1337,7 +2753,16 @@ class Spinbox(Node):
         self.rect.size = self.img.get_size()
         self.render()
 
+    def restore(self):
+        if self.img == None:
+            self.img = pygame.Surface(self.rect.size)
+            self.img.set_colorkey(Color('white'))
+            self.render()
+        super().restore()
+
     def render(self):
+        self.value.set_text(str(self.val))
+        self.own_img()
         self.img.fill(Color('white'))
         self.img.blit(self.label.img, (0, 0))
         self.img.blit(self.value.img, (self.w[0], 0))
@@ -1351,12 +2776,10 @@ class Spinbox(Node):
                 self.val = min(self.max, self.val + self.inc)
             elif event.key in (K_LEFT, K_DOWN):
                 self.val = max(self.min, self.val - self.inc)
-            self.value.text = str(self.val)
-            self.value.render()
-            self.render()
 
 class Rectangle(Node):
     """Draw a rectangle on the screen."""
+    render_attrs = ('fg', 'bg', 'thickness')
     options = { 'fg': Color('green'),
                 'bg': Color('black'),
                 'thickness': 2}
@@ -1384,6 +2807,76 @@ class Ellipse(Rectangle):
         pygame.draw.ellipse(self.img0, self.bg, Rect(0, 0, *self.rect.size), self.thickness)
         self.img = self.img0.copy()
 
+class PuzzlePack:
+    """Hold many m x n puzzles in one int8 array of shape (count, m, n).
+    In text files a puzzle is one line (or m lines) of digits, with '.' for
+    an empty cell. Binary packs are .npy files, which are memory-mapped."""
+    chunk = 1 << 22  # bytes read at a time when streaming a text file
+
+    # cell value of each byte, -1 for invalid characters
+    values = np.full(256, -1, dtype='int8')
+    values[ord('0'):ord('9')+1] = np.arange(10)
+    values[ord('.')] = 0
+
+    def __init__(self, puzzles):
+        self.puzzles = puzzles
+
+    def __len__(self):
+        return len(self.puzzles)
+
+    def __getitem__(self, i):
+        return self.puzzles[i]
+
+    @staticmethod
+    def parse(data, m, n):
+        """Parse the puzzles in a bytes string, ignoring the whitespace."""
+        buf = np.frombuffer(data, dtype=np.uint8)
+        return PuzzlePack.to_cells(buf[buf > 32], m, n)
+
+    @staticmethod
+    def to_cells(buf, m, n):
+        """Convert the characters of whole puzzles to a (count, m, n) array."""
+        cells = PuzzlePack.values[buf]
+        if (cells < 0).any():
+            raise ValueError('invalid character in puzzle')
+        if len(cells) % (m*n) != 0:
+            raise ValueError(f'incomplete {m}x{n} puzzle')
+        return cells.reshape(-1, m, n)
+
+    @classmethod
+    def read(cls, path, m, n):
+        """Read all the puzzles of a text file."""
+        with open(path, 'rb') as f:
+            return cls(cls.parse(f.read(), m, n))
+
+    @staticmethod
+    def stream(path, m, n):
+        """Yield the puzzles of a text file in batches, reading it chunk by chunk."""
+        size = m * n
+        rest = np.zeros(0, dtype=np.uint8)
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(PuzzlePack.chunk)
+                if not data:
+                    break
+                buf = np.frombuffer(data, dtype=np.uint8)
+                buf = np.concatenate((rest, buf[buf > 32]))
+                k = len(buf) // size * size
+                rest = buf[k:]
+                if k > 0:
+                    yield PuzzlePack.to_cells(buf[:k], m, n)
+        if len(rest) > 0:
+            raise ValueError(f'incomplete {m}x{n} puzzle')
+
+    def save(self, path):
+        """Save the puzzles as a binary pack."""
+        np.save(path, np.asarray(self.puzzles, dtype='int8'))
+
+    @classmethod
+    def load(cls, path):
+        """Open a binary pack, the puzzles are read from disk when used."""
+        return cls(np.load(path, mmap_mode='r'))
+
 class Board(Node):
     """Draw a mxn board grid with m lines and n columns.
     m, n    number of cells (row, col)
@@ -1393,6 +2886,7 @@ class Board(Node):
     Num0    initial numeric matrix
     Col     color matrix
     """
+    render_attrs = ('Num', 'Col')
     options = {
         'm': 4,
         'n': 4,
@@ -1411,6 +2905,9 @@ class Board(Node):
         'centered': False,  # grid is centered as in Go
         'keys': '0123456789', # keys which are accepted
     }
+    num_color = Color('black')
+    digits = {}  # (dx, dy) -> {k: (img, offset)}, number sprites shared by boards
+    init_render = True  # render in __init__, False for subclasses which render themselves
 
     def __init__(self, **options):
         super().__init__(**options)
@@ -1431,19 +2928,21 @@ class Board(Node):
         self.Num0 = self.Num.copy()
         self.Col = self.Num.copy()
 
-        self.font = pygame.font.Font(None, self.dy)
-        self.render()
+        self.font = App.get_font(None, self.dy)
+        if self.init_render:
+            self.render()
 
     def set_Num(self, s):
         """Load Num table from a string."""
-        s = s.replace('.', '0')
         lines = s.split()
         m = len(lines)
         n = len(lines[0])
-        self.Num = np.zeros((m, n), dtype='int8')
-        for i in range(m):
-            for j in range(n):
-                self.Num[i, j] = int(lines[i][j])
+        data = ''.join(line[:n] for line in lines).encode()
+        self.set_puzzle(PuzzlePack.parse(data, m, n)[0])
+
+    def set_puzzle(self, puzzle):
+        """Load a puzzle array, for example from a PuzzlePack, into Num and Num0."""
+        self.Num = np.array(puzzle, dtype='int8')
         self.Num0 = self.Num.copy()
         self.render()
 
@@ -1472,18 +2971,22 @@ class Board(Node):
             img_path = os.path.join(path, file)
             root, ext = os.path.splitext(img_path)
             if ext in ['.png', '.jpg']:
-                img = pygame.image.load(img_path)
-                img = pygame.transform.smoothscale(img, (self.dx, self.dy))
+                img = App.load_image(img_path, (self.dx, self.dy))
                 self.images.append(img)
 
     def render_colors(self):
-        """Render the background colors."""
-        for i in range(self.m):
-            for j in range(self.n):
-                rect = self.get_rect(i, j)
-                col = self.colors[self.Col[i, j]]
-                if col != None:
-                    pygame.draw.rect(self.img, col, rect)
+        """Render the background colors: map Col through the colors palette, 
+        expand the cells to blocks of pixels and write them in one operation."""
+        clear = self.img.map_rgb((0, 0, 0, 0))
+        palette = [clear if col == None else self.img.map_rgb(col) for col in self.colors]
+        px = pygame.surfarray.pixels2d(self.img)
+        cells = np.array(palette, dtype=np.int64).astype(px.dtype)[self.Col]
+        pixels = cells.repeat(self.dy, axis=0).repeat(self.dx, axis=1)
+
+        w = min(px.shape[0], pixels.shape[1])
+        h = min(px.shape[1], pixels.shape[0])
+        px[:w, :h] = pixels[:h, :w].T
+        del px  # unlock the surface
 
     def render_grid(self):
         """Render the grid lines."""
@@ -1504,32 +3007,54 @@ class Board(Node):
             
         for i in range(m):
             y = y0 + i * dy
-            pygame.draw.line(self.img, col, (x0, y), (x1, y), d)
+            pygame.draw.line(self.grid_img, col, (x0, y), (x1, y), d)
         for j in range(n):
             x = x0 + j * dx
-            pygame.draw.line(self.img, col, (x, y0), (x, y1), d)
+            pygame.draw.line(self.grid_img, col, (x, y0), (x, y1), d)
+
+    def get_digits(self):
+        """Return the number sprites for the cell size. They are rendered once,
+        for all int8 values, which include the keys alphabet."""
+        key = self.dx, self.dy
+        if key not in Board.digits:
+            Board.digits[key] = {}
+            for k in range(-128, 128):
+                self.get_digit(k)
+        return Board.digits[key]
+
+    def get_digit(self, k):
+        """Return the sprite of number k and its offset in the cell."""
+        digits = Board.digits.setdefault((self.dx, self.dy), {})
+        if k not in digits:
+            img = self.font.render(str(k), True, Board.num_color)
+            rect = img.get_rect(center=(self.dx//2, self.dy//2))
+            digits[k] = img, rect.topleft
+        return digits[k]
 
     def render_num(self):
-        """Draw number."""
-        for i in range(self.m):
-            for j in range(self.n):
-                k = self.Num[i, j]
-                if k != 0:
-                    img = self.font.render(str(k), True, Color('black'))
-                    rect = img.get_rect()
-                    rect.center = self.get_rect(i, j).center
-                    self.img.blit(img, rect)
+        """Draw the numbers from the sprite table, with one blits call."""
+        digits = self.get_digits()
+        i, j = np.nonzero(self.Num)
+        seq = []
+        for k, x0, y0 in zip(self.Num[i, j].tolist(), (j*self.dx).tolist(), (i*self.dy).tolist()):
+            img, (x, y) = digits[k] if k in digits else self.get_digit(k)
+            seq.append((img, (x0 + x, y0 + y)))
+        self.img.blits(seq, doreturn=False)
+
+    def draw_num(self, i, j, k):
+        img, (x, y) = self.get_digit(k)
+        self.img.blit(img, (j*self.dx + x, i*self.dy + y))
 
     def render_tile(self):
-        """Draw number."""
-        for i in range(self.m):
-            for j in range(self.n):
-                k = self.Num[i, j]
-                if k != 0:
-                    img = self.images[k]
-                    rect = img.get_rect()
-                    rect.center = self.get_rect(i, j).center
-                    self.img.blit(img, rect)
+        """Draw the tile images."""
+        for i, j in np.argwhere(self.Num).tolist():
+            self.draw_tile(i, j, self.Num[i, j])
+
+    def draw_tile(self, i, j, k):
+        img = self.images[k]
+        rect = img.get_rect()
+        rect.center = self.get_rect(i, j).center
+        self.img.blit(img, rect)
 
     def render_sel(self):
         col = self.selection_col[0]
@@ -1543,20 +3068,73 @@ class Board(Node):
         pygame.draw.rect(self.img, col, self.get_rect(self.i, self.j), d)
 
     def render(self):
-        """Render the whole board."""
-        self.img = pygame.Surface(self.rect.size, flags=SRCALPHA)
-        self.render_colors()
+        """Render the whole board. The grid is kept in a separate layer, 
+        for repainting single cells."""
+        if self.img == None or self.img.get_size() != self.rect.size:
+            self.img = pygame.Surface(self.rect.size, flags=SRCALPHA)
+        else:
+            self.own_img()
+            self.img.fill((0, 0, 0, 0))
+        self.rects = [None] * self.m
+        self.grid_img = pygame.Surface(self.rect.size, flags=SRCALPHA)
         self.render_grid()
+
+        self.render_colors()
+        self.img.blit(self.grid_img, (0, 0))
         self.render_num()
         self.render_sel()
         self.render_focus()
         if len(self.images) > 1: 
             self.render_tile()
+        self.shown = self.get_shown()
+
+    def get_shown(self):
+        """Return the state shown in the image: Num, Col, selection and focus."""
+        return self.Num.copy(), self.Col.copy(), set(self.selection), (self.i, self.j)
+
+    def refresh(self):
+        """Repaint only the cells which changed since the last render."""
+        Num, Col, sel, focus = self.shown
+        if Num.shape != self.Num.shape or Col.shape != self.Col.shape:
+            self.render()
+            return
+        changed = np.argwhere((Num != self.Num) | (Col != self.Col))
+        cells = set(map(tuple, changed.tolist()))
+        cells |= sel ^ set(self.selection)
+        cells |= {focus, (self.i, self.j)}
+
+        self.own_img()
+        for i, j in cells:
+            if 0 <= i < self.m and 0 <= j < self.n:
+                self.render_cell(i, j)
+        self.shown = self.get_shown()
+
+    def render_cell(self, i, j):
+        """Repaint one cell with the same layers as render."""
+        rect = self.get_rect(i, j)
+        col = self.colors[self.Col[i, j]]
+        self.img.fill((0, 0, 0, 0) if col == None else col, rect)
+        self.img.blit(self.grid_img, rect, rect)
+        k = self.Num[i, j]
+        if k != 0:
+            self.draw_num(i, j, k)
+        if (i, j) in self.selection:
+            col, d = self.selection_col
+            pygame.draw.rect(self.img, col, rect, d)
+        if (i, j) == (self.i, self.j):
+            col, d = self.focus_col
+            pygame.draw.rect(self.img, col, rect, d)
+        if len(self.images) > 1 and k != 0:
+            self.draw_tile(i, j, k)
 
     def get_rect(self, i, j):
-        dx = self.dx
-        dy = self.dy
-        return Rect(j*dx, i*dy, dx, dy)
+        """Return the rect of cell (i, j) from the table of cell rects.
+        The rect is shared, copy it before changing it."""
+        row = self.rects[i]
+        if row == None:
+            dx, dy = self.dx, self.dy
+            row = self.rects[i] = [Rect(j*dx, i*dy, dx, dy) for j in range(self.n)]
+        return row[j]
 
     def get_index(self, x, y):
         """Get index (i, j) from mouse position (x, y)."""
@@ -1574,7 +3152,7 @@ class Board(Node):
 
             i, j = self.get_index(*event.pos)
             k = self.Num[i, j]
-            self.drag_rect = self.get_rect(i, j)
+            self.drag_rect = self.get_rect(i, j).copy()
             # self.drag_img = self.images[k]
 
             if mods & KMOD_META:
@@ -1582,7 +3160,7 @@ class Board(Node):
             else:
                 self.selection = [(i, j)]
             print(self.selection)
-            self.render()
+            self.dirty = True
 
         elif event.type == MOUSEMOTION:
             if self.drag:
@@ -1605,18 +3183,18 @@ class Board(Node):
                 self.selection = [(i, j)]
                 self.i = i
                 self.j = j
-                self.render()
-            if event.unicode in self.keys:
+                self.dirty = True
+            if event.unicode != '' and event.unicode in self.keys:
                 print(event.unicode)
                 if self.Num0[self.i, self.j] == 0:
                     self.Num[self.i, self.j] = int(event.unicode)
-                    self.render()
+                    self.dirty = True
 
             elif event.key == K_RETURN:
                 k = self.Num[self.i, self.j]
                 k = (k+1) % 3
                 self.Num[self.i, self.j] = k
-                self.render()
+                self.dirty = True
 
 class Sudoku(Board):
     """Create a sudoko game board."""
@@ -1631,9 +3209,9 @@ class Sudoku(Board):
         d = self.grid[1] * 2
         x1, y1 = self.rect.size
         for x in [3 * self.dx, 6 * self.dx]:
-            pygame.draw.line(self.img, col, (x, 0), (x, y1), d)
+            pygame.draw.line(self.grid_img, col, (x, 0), (x, y1), d)
         for y in [3 * self.dy, 6 * self.dy]:
-            pygame.draw.line(self.img, col, (0, y), (x1, y), d)
+            pygame.draw.line(self.grid_img, col, (0, y), (x1, y), d)
 
 
 class Chess(Board):
@@ -1655,12 +3233,59 @@ class Chess(Board):
 
 
 class Go(Board):
+    """A Go board which follows the rules: click a point (or press Return)
+    to play a stone of the color to move, press p to pass. Captures,
+    suicide and ko are checked by a go_rules.Game, Num shows its board."""
     def __init__(self, **options):
         super().__init__(m=19, n=19, dx=10, dy=10, centered=True, colors=[Color('beige')], **options)
+        # the rules engine lives with the board games, in docs/9_board
+        import go_rules
+        self.game = go_rules.Game(self.n)
+        self.images = [None, self.render_stone(Color('black')), self.render_stone(Color('white'))]
+        self.render()
 
-    def render(self):
-        """Render the Go board and add extra dots on certain intersections."""
-        super().render()
+    def render_stone(self, col):
+        """Return the image of a stone which fills a cell."""
+        img = pygame.Surface((self.dx, self.dy), flags=SRCALPHA)
+        center = self.dx//2, self.dy//2
+        r = min(self.dx, self.dy)//2
+        pygame.draw.circle(img, col, center, r)
+        pygame.draw.circle(img, Color('black'), center, r, 1)
+        return img
+
+    def set(self, i, j):
+        """Play the color to move at (i, j), return False if the move is illegal."""
+        try:
+            self.game.play((i, j))
+        except ValueError as e:
+            App.scene.set_status(f'illegal move: {e}')
+            return False
+        self.Num = self.game.to_array()
+        b, w = self.game.captures[1:]
+        App.scene.set_status(f'captures: black {b}, white {w}')
+        return True
+
+    def pass_move(self):
+        """Pass, after two passes in a row show the area score."""
+        self.game.play(None)
+        black, white = self.game.score()
+        text = 'game over' if self.game.passes >= 2 else 'pass'
+        App.scene.set_status(f'{text}, score: black {black}, white {white}')
+
+    def do_event(self, event):
+        if event.type == MOUSEBUTTONDOWN:
+            self.i, self.j = self.get_index(*event.pos)
+            self.set(self.i, self.j)
+        elif event.type == KEYDOWN and event.key == K_RETURN:
+            self.set(self.i, self.j)
+        elif event.type == KEYDOWN and event.key == K_p:
+            self.pass_move()
+        else:
+            super().do_event(event)
+
+    def render_grid(self):
+        """Render the Go grid and add extra dots on certain intersections."""
+        super().render_grid()
         pts = []
         if self.n == 19:
             pts = [(3, 3), (9, 3), (16, 3), (3, 9), (9, 9), (16, 9),
@@ -1668,7 +3293,142 @@ class Go(Board):
         for (i, j) in pts:
             x = j * self.dx + self.dx//2
             y = i * self.dy + self.dy//2
-            pygame.draw.circle(self.img, Color('black'), (x, y), 3)
+            pygame.draw.circle(self.grid_img, Color('black'), (x, y), 3)
+
+
+class Life(Board):
+    """A large board for cellular automata such as the Game of Life.
+    The cells of Num (0 or 1) are stepped with whole-array operations and the
+    visible part is written to the image in one surfarray operation.
+    rule    'B3/S23': neighbor counts for birth and survival
+    zoom    cell size in pixels, changed with the mouse wheel
+    origin  top-left visible cell (i, j), changed by dragging
+    space runs or pauses, s makes a single step, r fills at random."""
+    zoom = 1
+    origin = 0, 0
+    running = False
+    zoom_range = 1, 32
+    init_render = False  # the buffers are set up after Board.__init__
+
+    def __init__(self, rule='B3/S23', size=None, **options):
+        self.set_rule(rule)
+        super().__init__(dx=1, dy=1, colors=[Color('black'), Color('white')], **options)
+        self.Num = np.zeros((self.m, self.n), dtype='uint8')
+        self.generation = 0
+
+        # buffers for the neighbor sums, the grid is a torus
+        self.pad = np.zeros((self.m+2, self.n+2), dtype='uint8')
+        self.sum3 = np.zeros((self.m, self.n+2), dtype='uint8')
+        self.sum9 = np.zeros((self.m, self.n), dtype='uint8')
+
+        if size != None:
+            self.size = size
+            self.rect.size = size
+        self.img = pygame.Surface(self.rect.size)
+        self.render()
+
+    def set_rule(self, rule):
+        """Parse a rule such as 'B3/S23'. The 3x3 sum includes the cell itself,
+        so a living cell with k neighbors has the sum k+1. The sums are grouped
+        by their result: alive in any case, only for living or only for dead cells."""
+        born, survive = rule.upper().split('/')
+        born = {int(k) for k in born[1:]}
+        survive = {int(k) + 1 for k in survive[1:]}
+        self.rule = rule
+        self.rule_sums = (sorted(born & survive), sorted(survive - born), sorted(born - survive))
+
+    def step(self):
+        """Compute the next generation, with shifted sums of the padded grid."""
+        a, pad, s3, s9 = self.Num, self.pad, self.sum3, self.sum9
+        pad[1:-1, 1:-1] = a
+        pad[0, 1:-1] = a[-1]
+        pad[-1, 1:-1] = a[0]
+        pad[:, 0] = pad[:, -2]
+        pad[:, -1] = pad[:, 1]
+        np.add(pad[:-2], pad[1:-1], out=s3)
+        s3 += pad[2:]
+        np.add(s3[:, :-2], s3[:, 1:-1], out=s9)
+        s9 += s3[:, 2:]
+
+        new = np.zeros(a.shape, dtype=bool)
+        group = np.empty(a.shape, dtype=bool)
+        eq = np.empty(a.shape, dtype=bool)
+        both, alive, dead = self.rule_sums
+        for sums, mask in ((both, None), (alive, a), (dead, a == 0)):
+            if sums:
+                group[:] = False
+                for k in sums:
+                    np.equal(s9, k, out=eq)
+                    group |= eq
+                if mask is not None:
+                    group &= mask.view(bool)
+                new |= group
+        self.Num = new.view('uint8')
+        self.generation += 1
+
+    def randomize(self, p=0.3):
+        self.Num = (np.random.random((self.m, self.n)) < p).astype('uint8')
+
+    def update(self):
+        if self.running:
+            self.step()
+
+    def render(self):
+        """Map the visible cells through the colors and write them in one operation."""
+        w, h = self.rect.size
+        z = self.zoom
+        i0, j0 = self.origin
+        cells = self.Num[i0:i0 + -(-h // z), j0:j0 + -(-w // z)]
+        palette = np.array([self.img.map_rgb(col) for col in self.colors], dtype=np.int64)
+        px = pygame.surfarray.pixels2d(self.img)
+        pixels = palette.astype(px.dtype)[cells]
+        if z > 1:
+            pixels = pixels.repeat(z, axis=0).repeat(z, axis=1)
+        pixels = pixels[:h, :w]
+        px[:pixels.shape[1], :pixels.shape[0]] = pixels.T
+        px[pixels.shape[1]:] = palette[0]
+        px[:, pixels.shape[0]:] = palette[0]
+        del px  # unlock the surface
+
+    def refresh(self):
+        self.render()
+
+    def set_origin(self, i, j):
+        """Set the top-left visible cell, keeping the view inside the grid."""
+        w, h = self.rect.size
+        i = max(0, min(int(i), self.m - h // self.zoom))
+        j = max(0, min(int(j), self.n - w // self.zoom))
+        self.origin = i, j
+        self.dirty = True
+
+    def zoom_at(self, steps, pos):
+        """Zoom by powers of 2, keeping the cell under pos in place."""
+        x, y = pos[0] - self.rect.left, pos[1] - self.rect.top
+        i, j = self.origin[0] + y / self.zoom, self.origin[1] + x / self.zoom
+        z0, z1 = self.zoom_range
+        self.zoom = max(z0, min(z1, int(self.zoom * 2**steps)))
+        self.set_origin(i - y / self.zoom, j - x / self.zoom)
+
+    def do_event(self, event):
+        if event.type == MOUSEBUTTONDOWN:
+            self.drag = True
+            self.drag_pos = self.origin
+            self.drag_rel = 0, 0
+        elif event.type == MOUSEMOTION and self.drag:
+            dx, dy = self.drag_rel[0] + event.rel[0], self.drag_rel[1] + event.rel[1]
+            self.drag_rel = dx, dy
+            self.set_origin(self.drag_pos[0] - dy / self.zoom, self.drag_pos[1] - dx / self.zoom)
+        elif event.type == MOUSEBUTTONUP:
+            self.drag = False
+        elif event.type == MOUSEWHEEL:
+            self.zoom_at(event.y, pygame.mouse.get_pos())
+        elif event.type == KEYDOWN:
+            if event.key == K_SPACE:
+                self.running = not self.running
+            elif event.key == K_s:
+                self.step()
+            elif event.key == K_r:
+                self.randomize()
 
 
 class Puzzle(Node):
@@ -0,0 +1 @@
+../9_board/go_rules.py
\ No newline at end of file
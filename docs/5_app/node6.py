@@ -0,0 +1,19 @@
+"""Nodes with child nodes."""
+from app import *
+
+class Demo(App):
+    def __init__(self): 
+        super().__init__(size=(640, 400))
+
+        Scene(caption='Nested nodes')
+        panel = Rectangle(size=(300, 200), fg=Color('white'), dir=(1, 0))
+        Rectangle(parent=panel, size=(120, 80), fg=Color('yellow'))
+        sub = Rectangle(parent=panel, size=(200, 100), fg=Color('lightblue'))
+        ListBox(['Charlie', 'Daniel', 'Tim', 'Jack'], parent=sub, m=3)
+
+        panel2 = Rectangle(size=(200, 200), fg=Color('beige'))
+        Ellipse(parent=panel2, size=(100, 60), fg=Color('pink'))
+        Ellipse(parent=panel2, size=(150, 150))  # clipped by the parent
+
+if __name__ == '__main__':
+    Demo().run()
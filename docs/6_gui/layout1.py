@@ -0,0 +1,23 @@
+"""Arrange nodes with Row, Column and Grid layouts."""
+from app import *
+
+class Demo(App):
+    def __init__(self):
+        super().__init__(size=(640, 400))
+        Scene(caption='Layout', bg=Color('beige'))
+
+        # a toolbar anchored at the top right corner of the window
+        Row(Button('New', size=(80, 30)), Button('Open', size=(80, 30)),
+            Button('Save', size=(80, 30)), anchor='topright', offset=(-10, 10))
+
+        # a keypad, placed at the position of its first button
+        keys = [Button(str(k), size=(40, 40)) for k in range(1, 10)]
+        Grid(*keys, cols=3, spacing=(5, 5))
+
+        # layouts can be nested, this one is anchored along the bottom side
+        Column(Text('Save the changes?', size=(200, 30)),
+               Row(Button('OK', size=(80, 30)), Button('Cancel', size=(80, 30))),
+               anchor='bottom', pos=(20, 0), offset=(0, -10))
+        
+if __name__ == '__main__':
+    Demo().run()
@@ -28,6 +28,8 @@ colors  list of colors
 T       number matrix
 C       color matrix
 V       visibilty matrix
+        change cells with set_t and set_v, or assign a whole new matrix,
+        so that the board knows which cells to draw again
 L       display object list
 H       history list
 
@@ -43,10 +45,11 @@ r  ->  random(board)
 t  ->  test(board)
 """
 
-import pygame, os, sys
+import pygame, os, re, sys
 import numpy as np
 from pygame.locals import *
 from time import time, sleep
+import go_rules
 
 
 # Define colors
@@ -68,6 +71,9 @@ LIGHTGRAY = (200, 200, 200)
 LIME = (200, 255, 0)
 BEIGE = (255, 255, 127)
 
+# numbers in texts are composed from the glyphs of a digit atlas
+NUMBER = re.compile(r'([0-9.-]+)')
+
 class Cell():
     """Represents a single cell of the board."""
     def __init__(self, i=0, j=0, k=0, col=None):
@@ -113,6 +119,8 @@ class Board():
         self.font2 = pygame.font.SysFont('Helvetica', 12)
         self.fontL = pygame.font.SysFont('Helvetica', 100)
         self.text2_pos = [0, 0]
+        self.texts = {}   # rendered texts for draw_text and draw_text2
+        self.digits = {}  # (col, bg) -> digit atlas of the small font
         
         self.clock = pygame.time.Clock()
         pygame.display.set_caption(title)
@@ -133,6 +141,18 @@ class Board():
         self.sounds = []
 
         self.txt_col = BLACK
+
+        # cached layers: background and colors, with the grid
+        self.static_key = None
+        self.colors_img = None
+        self.static_img = None
+        self.changed = None   # cells whose T or V changed, None for all
+        self.painted = set()  # cells drawn over by draw_rect
+        self.overlays = []    # rects drawn over by surf_list
+        self.info_img = None
+        self.info_time = 0
+        self.info_period = 0.25  # seconds between info panel updates
+        self.info = []  # lines added to the info panel by a game
         
         self.cursor = True
         self.cursor_col = RED
@@ -157,6 +177,14 @@ class Board():
         self.keys[K_x] = lambda x :self.show_start('Over', BLACK, BLUE)
                 
         
+    def __setattr__(self, name, value):
+        """Assigning T or V draws all the cells again, assigning C the colors."""
+        super().__setattr__(name, value)
+        if name in ('T', 'V'):
+            self.__dict__['changed'] = None
+        elif name == 'C':
+            self.__dict__['static_key'] = None
+
     def __str__(self):
         text = 'Board ({}, {}) of {}'
         return text.format(self.n, self.m, self.title)
@@ -176,6 +204,7 @@ class Board():
             self.screen.blit(surf2, rect)           
             pygame.display.update()
             phi += 2
+        self.static_key = None
 
     def show_info(self):
         """Displays game info on the side."""
@@ -191,6 +220,8 @@ class Board():
         self.draw_text2('key={}'.format(self.event_key))
         self.draw_text2('mod={}'.format(self.event_mod))
         self.draw_text2('unicode={}'.format(self.event_unicode))
+        for line in self.info:
+            self.draw_text2(line)
         
     def game_over(self):
         self.show_text('Game Over')
@@ -212,6 +243,10 @@ class Board():
         files = os.listdir(dir)
         for file in files:
             img = pygame.image.load(dir + '/' + file)
+            # a tile must not reach into the neighbor cells
+            w, h = img.get_size()
+            if w > self.dx or h > self.dy:
+                img = pygame.transform.smoothscale(img, (min(w, self.dx), min(h, self.dy)))
             self.images.append(img)
     
     def load_sounds(self, folder):
@@ -228,9 +263,22 @@ class Board():
         """Set the integer matrix T."""
         self.T = T
 
+    def set_t(self, i, j, t):
+        """Set the value of cell [i, j]."""
+        self.T[i, j] = t
+        if self.changed != None:
+            self.changed.add((i, j))
+
+    def set_v(self, i, j, v):
+        """Set the visibility of cell [i, j]."""
+        self.V[i, j] = v
+        if self.changed != None:
+            self.changed.add((i, j))
+
     def shuffle_T(self):
         """Shuffles the values of T."""
         np.random.shuffle(self.T)
+        self.changed = None
 
     def init_T(self, k):
         """Inizialize T with zeros (0), range (1), pairs (2)."""
@@ -245,9 +293,8 @@ class Board():
 
     def set_C(self):
         """Set checkerboard pattern."""
-        for i in range(self.n):
-            for j in range(self.m):
-                self.C[i, j] = (i + j) % 2
+        i, j = np.indices((self.n, self.m))
+        self.C = (i + j) % 2
 
     def get_rect(self, i, j):
         """Return a Rect object for the tile [i, j]."""
@@ -297,20 +344,24 @@ class Board():
             pygame.draw.line(self.screen, self.grid_col, p0, p1, self.grid_d)  
  
     def draw_rect(self, i, j, col, d=0):
-        """Draw a colored tile at position [i, j]."""
+        """Draw a colored tile at position [i, j], until the next frame."""
         pygame.draw.rect(self.screen, col, self.get_rect(i, j), d)
+        self.painted.add((i, j))
 
     def draw_rects(self, L, col):
         """Draw colored tile from a list L."""
         for (i, j) in L:
             self.draw_rect(i, j, col)
 
-    def draw_text(self, i, j, text, col, bg=None):
-        """Draw text at position [i, j]."""
-        txt = self.font.render(text, True, col, bg)
+    def draw_text(self, i, j, text, col, bg=None, surf=None):
+        """Draw text at position [i, j], on the screen or on surf."""
+        key = text, col, bg
+        if key not in self.texts:
+            self.texts[key] = self.font.render(text, True, col, bg)
+        txt = self.texts[key]
         rect = txt.get_rect()
         rect.center = self.get_rect(i, j).center
-        self.screen.blit(txt, rect)
+        (surf or self.screen).blit(txt, rect)
         
     def draw_text2(self, text, x=None, y=None, col=BLACK, bg=None):
         """Draw small text."""
@@ -319,10 +370,46 @@ class Board():
             self.text2_pos[0] = x
         if y != None:
             self.text2_pos[1] = y
-        txt = self.font2.render(text, True, col, bg)
-        rect = txt.get_rect()
-        rect.topleft = self.text2_pos
-        self.screen.blit(txt, rect)
+        # the words are rendered once, the numbers are blitted digit by digit
+        x, y = self.text2_pos
+        atlas, areas = self.get_digits(col, bg)
+        seq = []
+        for k, run in enumerate(NUMBER.split(text)):
+            if k % 2:
+                for c in run:
+                    seq.append((atlas, (x, y), areas[c]))
+                    x += areas[c].width
+            elif run:
+                key = self.font2, run, col, bg
+                if key not in self.texts:
+                    if len(self.texts) > 1024:
+                        self.texts.clear()
+                    self.texts[key] = self.font2.render(run, True, col, bg)
+                seq.append((self.texts[key], (x, y)))
+                x += self.texts[key].get_width()
+        self.screen.blits(seq, doreturn=False)
+
+    def get_digits(self, col=BLACK, bg=None):
+        """Return the small-font atlas of '0123456789.-' and the area of each
+        character. The digits have the same width, so numbers do not jitter."""
+        if (col, bg) not in self.digits:
+            w = max(self.font2.size(c)[0] for c in '0123456789')
+            widths = [w] * 10 + [self.font2.size(c)[0] for c in '.-']
+            h = self.font2.get_height()
+            atlas = pygame.Surface((sum(widths), h), SRCALPHA)
+            if bg != None:
+                atlas.fill(bg)
+            areas = {}
+            x = 0
+            for c, w in zip('0123456789.-', widths):
+                img = self.font2.render(c, True, col, bg)
+                # copy the glyph with its alpha onto the transparent atlas
+                atlas.blit(img, (x + (w - img.get_width()) // 2, 0),
+                           special_flags=0 if bg != None else BLEND_RGBA_MAX)
+                areas[c] = Rect(x, 0, w, h)
+                x += w
+            self.digits[col, bg] = atlas, areas
+        return self.digits[col, bg]
  
     def draw_C(self):
         """Draw colors."""
@@ -332,38 +419,101 @@ class Board():
                 if col > 0:
                      self.draw_rect(i, j, self.colors[col], 0)
                         
-    def draw_T(self):
+    def draw_T(self, surf=None):
         """Draw the number matrix T."""
         for i in range(self.n):
             for j in range(self.m):
-                t = self.T[i, j]
-                if t != 0 and self.V[i, j] == 1:
-                    if len(self.images) > 0:
-                        self.draw_img(i, j, t)
-                    else:
-                        self.draw_text(i, j, str(t), BLACK)                    
-
-    def draw_img(self, i, j, k):
+                self.draw_t(i, j, surf)
+
+    def draw_t(self, i, j, surf=None):
+        """Draw the number or image of cell [i, j]."""
+        t = self.T[i, j]
+        if t != 0 and self.V[i, j] == 1:
+            if len(self.images) > 0:
+                self.draw_img(i, j, t, surf)
+            else:
+                self.draw_text(i, j, str(t), BLACK, surf=surf)
+
+    def draw_img(self, i, j, k, surf=None):
         """Draw image k at tile [i, j]."""
         if k < len(self.images):
             img = self.images[k]
             r = self.get_rect(i, j)
-            self.screen.blit(img, r)
+            (surf or self.screen).blit(img, r, Rect(0, 0, self.dx, self.dy))
+
+    def get_static_key(self):
+        """Return what the layers depend on: colors, images and grid settings.
+        Assigning C resets the key."""
+        return (tuple(self.colors), tuple(self.images), self.bg,
+                self.grid_col, self.grid_d, self.grid_center, self.grid_x2,
+                self.n, self.m, self.dx, self.dy, self.x0, self.y0)
+
+    def draw_board(self):
+        """Draw the background, colors, grid and T. The screen keeps the
+        board between frames: the layers are rendered again when C, the
+        images or the grid change, else only the cells which changed or
+        were drawn over are drawn again, from the cached layers."""
+        key = self.get_static_key()
+        if key != self.static_key:
+            self.draw_bg()
+            self.draw_C()
+            self.colors_img = self.screen.copy()
+            self.draw_grid()
+            self.static_img = self.screen.copy()
+            self.draw_T()
+            self.static_key = key
+        elif self.changed == None:
+            self.screen.blit(self.static_img, (0, 0))
+            self.draw_T()
+        else:
+            cells = self.changed | self.painted
+            for rect in self.overlays:
+                self.screen.blit(self.static_img, rect, rect)
+                i0, j0 = self.get_index(*rect.topleft)
+                i1, j1 = self.get_index(*rect.move(-1, -1).bottomright)
+                cells.update((i, j) for i in range(i0, i1+1) for j in range(j0, j1+1))
+            for i, j in cells:
+                r = self.get_rect(i, j)
+                self.screen.blit(self.static_img, r, r)
+                self.draw_t(i, j)
+        self.changed = set()
+        self.painted = set()
+        self.overlays = []
+
+    def draw_cursor(self):
+        """Draw the cursor cell again: colors, cursor, grid lines and T."""
+        i, j = self.pos
+        r = self.get_rect(i, j)
+        self.screen.blit(self.colors_img, r, r)
+        self.draw_rect(i, j, RED, 2)
+        self.screen.set_clip(r)
+        self.draw_grid()
+        self.draw_t(i, j)
+        self.screen.set_clip(None)
+
+    def draw_info(self):
+        """Draw the info panel, rendered at most once per info_period."""
+        x = self.x0 + self.m * self.dx + 20
+        rect = Rect(x, 0, max(0, self.w - x), self.h)
+        if self.info_img == None or self.t - self.info_time >= self.info_period:
+            self.screen.blit(self.static_img, rect, rect)
+            self.show_info()
+            self.info_img = self.screen.subsurface(rect).copy()
+            self.info_time = self.t
+        else:
+            self.screen.blit(self.info_img, rect)
 
     def update(self):
         """Update the display and wait for the next tick."""
         self.t = time()
         self.frame += 1
         self.loop(self)
-        self.draw_bg()
-        self.draw_C()
+        self.draw_board()
         if self.cursor:
-            self.draw_rect(*self.pos, RED, 2)
-        self.draw_grid()
-        self.draw_T()
-        self.show_info()
+            self.draw_cursor()
+        self.draw_info()
         for (surf, rect) in self.surf_list:
-            self.screen.blit(surf, rect)
+            self.overlays.append(self.screen.blit(surf, rect))
         pygame.display.update()
         self.clock.tick(self.fps)
 
@@ -411,7 +561,7 @@ class Board():
             t = self.T[i, j]
             if t != 0 and len(self.images)>0:
                 self.cursor_img = self.images[t]
-                self.T[i, j] = 0
+                self.set_t(i, j, 0)
                 self.cursor_val = t
                 
         elif event.type == MOUSEBUTTONUP:
@@ -420,7 +570,7 @@ class Board():
             self.pos = [i, j]         
             t = self.T[i, j]
             if t == 0 and len(self.images) > 0:
-                self.T[i, j] = self.cursor_val
+                self.set_t(i, j, self.cursor_val)
             self.play(self)
             
 ## ---------------------------------------------------------------
@@ -428,15 +578,26 @@ def set_game(game):
     if game == 'go':
         def play(board):
             i, j = board.pos
-            t = board.T[i, j]
-            if t == 0:
-                board.T[i, j] = board.p
-                board.p = 3 - board.p
+            if board.game.is_legal((i, j)):
+                board.game.play((i, j))
+                board.T = board.game.to_array().astype(int)
+                board.p = board.game.color
                 board.L.append((i, j))
+                board.info = []
+                board.info_img = None
+
+        def pass_move(board):
+            board.game.play(None)
+            board.p = board.game.color
+            black, white = board.game.score()
+            board.info = ['pass', 'score black={} white={}'.format(black, white)]
+            board.info_img = None
            
         board = Board(19, 19, 40, 40, 40, 40, BEIGE, 'Go')
         board.grid_center = True
+        board.game = go_rules.Game(19)
         board.play = play        
+        board.keys[K_p] = pass_move
 
     elif game == 'chess':
         board = Board(8, 8, 100, 100, 50, 50, WHITE, 'Chess')
@@ -534,12 +695,12 @@ def set_game(game):
             i, j = board.pos
             L = board.L
             if board.V[i, j] == 0:
-                board.V[i, j] = 1
+                board.set_v(i, j, 1)
             board.L.append((i, j))
             if len(board.L) > 2 :
                 if board.T[L[0]] != board.T[L[1]]:
-                    board.V[L[0]] = 0
-                    board.V[L[1]] = 0
+                    board.set_v(*L[0], 0)
+                    board.set_v(*L[1], 0)
                 board.L = [(i, j)]
             
         board = Board(6, 8, 80, 80, 40, 40, YELLOW, 'Memory Puzzle')
@@ -555,7 +716,9 @@ def set_game(game):
             i = i0 - board.dir[0]
             j = j0 - board.dir[1]           
             if 0 <= i < board.n and 0 <= j < board.m:
-                (board.T[i, j], board.T[i0, j0]) = (board.T[i0, j0], board.T[i, j]) 
+                t = board.T[i, j]
+                board.set_t(i, j, board.T[i0, j0])
+                board.set_t(i0, j0, t)
             
         board = Board(4, 4, 100, 100, 20, 20, WHITE, 'Sliding Puzzle')
         board.init_T(1)
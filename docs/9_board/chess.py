@@ -1,12 +1,58 @@
 """Chess game."""
 from app import *
+import chess_engine
+
+class ChessGame(Chess):
+    """A chess board which only accepts legal moves.
+    Click a piece to show its moves, then click a destination square."""
+
+    def reset(self):
+        self.position = chess_engine.Position()
+        self.moves = []  # legal moves of the selected piece
+        self.Num = self.position.to_array()
+        self.selection = []
+        self.render()
+
+    def square(self, i, j):
+        return (7-i) * 8 + j
+
+    def do_event(self, event):
+        if event.type == KEYDOWN:
+            # Board would write the keys into Num, past the engine position
+            return
+        if event.type != MOUSEBUTTONDOWN:
+            super().do_event(event)
+            return
+
+        i, j = self.get_index(*event.pos)
+        s = self.square(i, j)
+        moves = [m for m in self.moves if chess_engine.move_to(m) == s]
+        if moves:
+            # promote to a queen
+            m = max(moves, key=chess_engine.move_promo)
+            self.position = self.position.make(m)
+            self.Num = self.position.to_array()
+            self.moves = []
+            self.selection = []
+            if self.position.is_checkmate():
+                App.scene.set_status(f'{chess_engine.uci(m)} checkmate')
+            elif self.position.is_stalemate():
+                App.scene.set_status(f'{chess_engine.uci(m)} stalemate')
+            else:
+                App.scene.set_status(chess_engine.uci(m) + (' check' if self.position.in_check() else ''))
+        else:
+            self.moves = [m for m in self.position.moves() if chess_engine.move_from(m) == s]
+            self.selection = [(i, j)] + [(7 - chess_engine.move_to(m) // 8, chess_engine.move_to(m) % 8)
+                                         for m in self.moves]
+        self.i, self.j = i, j
+        self.dirty = True
 
 class Demo(App):
     def __init__(self):
         super().__init__(size=(640, 480))
-        
+
         Scene(caption='Chess')
-        Chess(folder='chess')
+        ChessGame(folder='chess')
 
 if __name__ == '__main__':
-    Demo().run()
\ No newline at end of file
+    Demo().run()
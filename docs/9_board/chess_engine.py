@@ -0,0 +1,412 @@
+"""Chess move generator.
+
+A position is a set of bitboards: one 64-bit integer per color and piece,
+where bit s is set when square s holds that piece (a1 is 0, h1 is 7, a8 is
+56). Sliding attacks follow the rays from a square up to the first blocker.
+Moves are generated for the pieces, then a move is legal if the king is not
+attacked after it is made. Positions are copied by make(), which also
+updates their Zobrist hash.
+
+Perft counts the leaf nodes of the move tree, to check the generator
+against known values and to measure its speed:
+
+    python chess_engine.py [depth]
+"""
+
+import random
+
+import numpy as np
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+PIECES = 'PNBRQKpnbrqk'  # FEN letters of the 12 pieces, indexed by color*6 + kind
+FULL = (1 << 64) - 1
+
+RANK_1, RANK_3, RANK_6, RANK_8 = 0xFF, 0xFF << 16, 0xFF << 40, 0xFF << 56
+
+START = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+
+def _steps(s, deltas):
+    """Return the mask of the squares at the (file, rank) deltas from square s."""
+    f, r = s % 8, s // 8
+    mask = 0
+    for df, dr in deltas:
+        if 0 <= f+df < 8 and 0 <= r+dr < 8:
+            mask |= 1 << ((r+dr) * 8 + f+df)
+    return mask
+
+def _ray(s, df, dr):
+    f, r = s % 8 + df, s // 8 + dr
+    mask = 0
+    while 0 <= f < 8 and 0 <= r < 8:
+        mask |= 1 << (r*8 + f)
+        f, r = f + df, r + dr
+    return mask
+
+KNIGHT_ATTACKS = [_steps(s, [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+                  for s in range(64)]
+KING_ATTACKS = [_steps(s, [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)])
+                for s in range(64)]
+PAWN_ATTACKS = [[_steps(s, [(-1, 1), (1, 1)]) for s in range(64)],
+                [_steps(s, [(-1, -1), (1, -1)]) for s in range(64)]]
+
+# rays towards higher squares (the first blocker is the lowest bit) and lower squares
+ROOK_UP = [[_ray(s, *d) for s in range(64)] for d in ((0, 1), (1, 0))]
+ROOK_DOWN = [[_ray(s, *d) for s in range(64)] for d in ((0, -1), (-1, 0))]
+BISHOP_UP = [[_ray(s, *d) for s in range(64)] for d in ((1, 1), (-1, 1))]
+BISHOP_DOWN = [[_ray(s, *d) for s in range(64)] for d in ((1, -1), (-1, -1))]
+
+def _slide(s, occ, up, down):
+    attacks = 0
+    for rays in up:
+        ray = rays[s]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in down:
+        ray = rays[s]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+def rook_attacks(s, occ):
+    return _slide(s, occ, ROOK_UP, ROOK_DOWN)
+
+def bishop_attacks(s, occ):
+    return _slide(s, occ, BISHOP_UP, BISHOP_DOWN)
+
+# castling rights: K, Q, k, q; a move from or to a square keeps the rights of its mask
+WK, WQ, BK, BQ = 1, 2, 4, 8
+CASTLE_MASK = [15] * 64
+CASTLE_MASK[4], CASTLE_MASK[7], CASTLE_MASK[0] = 15 ^ (WK|WQ), 15 ^ WK, 15 ^ WQ
+CASTLE_MASK[60], CASTLE_MASK[63], CASTLE_MASK[56] = 15 ^ (BK|BQ), 15 ^ BK, 15 ^ BQ
+
+_rand = random.Random(2019)
+Z_PIECE = [[_rand.getrandbits(64) for s in range(64)] for p in range(12)]
+Z_CASTLE = [_rand.getrandbits(64) for c in range(16)]
+Z_EP = [_rand.getrandbits(64) for f in range(8)]
+Z_SIDE = _rand.getrandbits(64)
+
+
+def square(name):
+    """Return the square of a name such as 'e4'."""
+    return (int(name[1]) - 1) * 8 + ord(name[0]) - 97
+
+def square_name(s):
+    return 'abcdefgh'[s % 8] + str(s // 8 + 1)
+
+# a move is an integer: from square, to square and promotion kind
+def move_from(m):
+    return m & 63
+
+def move_to(m):
+    return (m >> 6) & 63
+
+def move_promo(m):
+    return m >> 12
+
+def uci(m):
+    """Return a move in the UCI notation, for example 'e2e4' or 'e7e8q'."""
+    promo = 'nbrq'[move_promo(m) - 1] if move_promo(m) else ''
+    return square_name(move_from(m)) + square_name(move_to(m)) + promo
+
+
+class Position:
+    """A chess position, given by a FEN string."""
+
+    def __init__(self, fen=START):
+        fields = fen.split()
+        self.pieces = [0] * 12  # bitboards, indexed by color*6 + kind
+        self.board = [-1] * 64  # piece on each square, or -1
+        for r, row in enumerate(fields[0].split('/')):
+            f = 0
+            for c in row:
+                if c.isdigit():
+                    f += int(c)
+                else:
+                    s = (7-r) * 8 + f
+                    p = PIECES.index(c)
+                    self.pieces[p] |= 1 << s
+                    self.board[s] = p
+                    f += 1
+        self.occ = [0, 0]
+        for p in range(12):
+            self.occ[p // 6] |= self.pieces[p]
+        self.side = WHITE if fields[1] == 'w' else BLACK
+        self.castling = sum(bit for bit, c in zip((WK, WQ, BK, BQ), 'KQkq') if c in fields[2])
+        self.ep = -1 if fields[3] == '-' else square(fields[3])
+        self.halfmove = int(fields[4]) if len(fields) > 4 else 0
+        self.fullmove = int(fields[5]) if len(fields) > 5 else 1
+        self.hash = self.get_hash()
+
+    def get_hash(self):
+        """Compute the Zobrist hash from scratch, make() updates it incrementally."""
+        h = Z_CASTLE[self.castling]
+        for s, p in enumerate(self.board):
+            if p >= 0:
+                h ^= Z_PIECE[p][s]
+        if self.ep >= 0:
+            h ^= Z_EP[self.ep % 8]
+        if self.side == BLACK:
+            h ^= Z_SIDE
+        return h
+
+    def fen(self):
+        rows = []
+        for r in range(7, -1, -1):
+            row, empty = '', 0
+            for f in range(8):
+                p = self.board[r*8 + f]
+                if p < 0:
+                    empty += 1
+                else:
+                    row += (str(empty) if empty else '') + PIECES[p]
+                    empty = 0
+            rows.append(row + (str(empty) if empty else ''))
+        castling = ''.join(c for bit, c in zip((WK, WQ, BK, BQ), 'KQkq') if self.castling & bit)
+        ep = square_name(self.ep) if self.ep >= 0 else '-'
+        return f"{'/'.join(rows)} {'wb'[self.side]} {castling or '-'} {ep} {self.halfmove} {self.fullmove}"
+
+    def attacked(self, s, by):
+        """Return True if square s is attacked by color by."""
+        p = by * 6
+        pieces = self.pieces
+        if PAWN_ATTACKS[1-by][s] & pieces[p + PAWN]:
+            return True
+        if KNIGHT_ATTACKS[s] & pieces[p + KNIGHT] or KING_ATTACKS[s] & pieces[p + KING]:
+            return True
+        occ = self.occ[0] | self.occ[1]
+        queens = pieces[p + QUEEN]
+        if bishop_attacks(s, occ) & (pieces[p + BISHOP] | queens):
+            return True
+        return bool(rook_attacks(s, occ) & (pieces[p + ROOK] | queens))
+
+    def king(self, color):
+        return self.pieces[color*6 + KING].bit_length() - 1
+
+    def in_check(self):
+        return self.attacked(self.king(self.side), 1 - self.side)
+
+    def pseudo_moves(self):
+        """Return the moves which follow the piece rules, the king may be left in check."""
+        us, them = self.side, 1 - self.side
+        pieces = self.pieces
+        own, opp = self.occ[us], self.occ[them]
+        occ = own | opp
+        empty = ~occ & FULL
+        p = us * 6
+        moves = []
+
+        pawns = pieces[p + PAWN]
+        if us == WHITE:
+            single = (pawns << 8) & empty
+            double = ((single & RANK_3) << 8) & empty
+            d, last = 8, RANK_8
+        else:
+            single = (pawns >> 8) & empty
+            double = ((single & RANK_6) >> 8) & empty
+            d, last = -8, RANK_1
+        targets = opp | (1 << self.ep if self.ep >= 0 else 0)
+        while single:
+            b = single & -single
+            single ^= b
+            to = b.bit_length() - 1
+            if b & last:
+                moves.extend((to-d) | to << 6 | k << 12 for k in (QUEEN, ROOK, BISHOP, KNIGHT))
+            else:
+                moves.append((to-d) | to << 6)
+        while double:
+            b = double & -double
+            double ^= b
+            to = b.bit_length() - 1
+            moves.append((to-2*d) | to << 6)
+        attacks = PAWN_ATTACKS[us]
+        while pawns:
+            b = pawns & -pawns
+            pawns ^= b
+            frm = b.bit_length() - 1
+            caps = attacks[frm] & targets
+            while caps:
+                c = caps & -caps
+                caps ^= c
+                to = c.bit_length() - 1
+                if c & last:
+                    moves.extend(frm | to << 6 | k << 12 for k in (QUEEN, ROOK, BISHOP, KNIGHT))
+                else:
+                    moves.append(frm | to << 6)
+
+        for kind in (KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            bb = pieces[p + kind]
+            while bb:
+                b = bb & -bb
+                bb ^= b
+                frm = b.bit_length() - 1
+                if kind == KNIGHT:
+                    dest = KNIGHT_ATTACKS[frm]
+                elif kind == BISHOP:
+                    dest = bishop_attacks(frm, occ)
+                elif kind == ROOK:
+                    dest = rook_attacks(frm, occ)
+                elif kind == QUEEN:
+                    dest = bishop_attacks(frm, occ) | rook_attacks(frm, occ)
+                else:
+                    dest = KING_ATTACKS[frm]
+                dest &= ~own
+                while dest:
+                    c = dest & -dest
+                    dest ^= c
+                    moves.append(frm | (c.bit_length() - 1) << 6)
+
+        # castling: the squares between are empty, the king does not cross an attacked square
+        if self.castling:
+            k = 0 if us == WHITE else 56
+            short, long = (WK, WQ) if us == WHITE else (BK, BQ)
+            if self.castling & short and not occ & (0x60 << k) and not any(
+                    self.attacked(k+i, them) for i in (4, 5, 6)):
+                moves.append((k+4) | (k+6) << 6)
+            if self.castling & long and not occ & (0x0E << k) and not any(
+                    self.attacked(k+i, them) for i in (4, 3, 2)):
+                moves.append((k+4) | (k+2) << 6)
+        return moves
+
+    def make(self, m):
+        """Return the position after move m."""
+        pos = Position.__new__(Position)
+        pieces = pos.pieces = self.pieces[:]
+        board = pos.board = self.board[:]
+        occ = pos.occ = self.occ[:]
+        us, them = self.side, 1 - self.side
+        frm, to, promo = m & 63, (m >> 6) & 63, m >> 12
+        bf, bt = 1 << frm, 1 << to
+        p = board[frm]
+        cap = board[to]
+        h = self.hash ^ Z_SIDE
+
+        if cap >= 0:
+            pieces[cap] ^= bt
+            occ[them] ^= bt
+            h ^= Z_PIECE[cap][to]
+        pieces[p] ^= bf | bt
+        occ[us] ^= bf | bt
+        board[frm] = -1
+        board[to] = p
+        h ^= Z_PIECE[p][frm] ^ Z_PIECE[p][to]
+
+        ep = -1
+        kind = p - us*6
+        if kind == PAWN:
+            if to == self.ep:
+                s = to - 8 if us == WHITE else to + 8
+                q = them*6 + PAWN
+                pieces[q] ^= 1 << s
+                occ[them] ^= 1 << s
+                board[s] = -1
+                h ^= Z_PIECE[q][s]
+            elif to - frm in (16, -16):
+                ep = (frm + to) // 2
+            if promo:
+                q = us*6 + promo
+                pieces[p] ^= bt
+                pieces[q] ^= bt
+                board[to] = q
+                h ^= Z_PIECE[p][to] ^ Z_PIECE[q][to]
+        elif kind == KING and to - frm in (2, -2):
+            rf, rt = (frm+3, frm+1) if to > frm else (frm-4, frm-1)
+            r = us*6 + ROOK
+            pieces[r] ^= 1 << rf | 1 << rt
+            occ[us] ^= 1 << rf | 1 << rt
+            board[rf] = -1
+            board[rt] = r
+            h ^= Z_PIECE[r][rf] ^ Z_PIECE[r][rt]
+
+        pos.castling = self.castling & CASTLE_MASK[frm] & CASTLE_MASK[to]
+        h ^= Z_CASTLE[self.castling] ^ Z_CASTLE[pos.castling]
+        if self.ep >= 0:
+            h ^= Z_EP[self.ep % 8]
+        if ep >= 0:
+            h ^= Z_EP[ep % 8]
+        pos.ep = ep
+        pos.side = them
+        pos.halfmove = 0 if kind == PAWN or cap >= 0 else self.halfmove + 1
+        pos.fullmove = self.fullmove + us
+        pos.hash = h
+        return pos
+
+    def legal_moves(self):
+        """Return the legal moves, with the positions they lead to."""
+        us, them = self.side, 1 - self.side
+        result = []
+        for m in self.pseudo_moves():
+            pos = self.make(m)
+            if not pos.attacked(pos.pieces[us*6 + KING].bit_length() - 1, them):
+                result.append((m, pos))
+        return result
+
+    def moves(self):
+        return [m for m, pos in self.legal_moves()]
+
+    def parse(self, text):
+        """Return the legal move given in UCI notation, or raise ValueError."""
+        for m in self.moves():
+            if uci(m) == text:
+                return m
+        raise ValueError(f'illegal move {text}')
+
+    def is_checkmate(self):
+        return self.in_check() and not self.legal_moves()
+
+    def is_stalemate(self):
+        return not self.in_check() and not self.legal_moves()
+
+    def to_array(self):
+        """Return the 8x8 array of the Chess board: rank 8 on top, the pieces
+        numbered 1 pawn, 2 rook, 3 knight, 4 bishop, 5 queen, 6 king, times 2
+        for white and times 2 minus 1 for black."""
+        kinds = [1, 3, 4, 2, 5, 6]
+        a = np.zeros((8, 8), dtype='int8')
+        for s, p in enumerate(self.board):
+            if p >= 0:
+                a[7 - s//8, s % 8] = kinds[p % 6] * 2 - p // 6
+        return a
+
+
+def perft(pos, depth):
+    """Count the leaf nodes of the legal move tree of the given depth."""
+    moves = pos.legal_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    return sum(perft(child, depth - 1) for m, child in moves)
+
+def divide(pos, depth):
+    """Return the perft count below each move, to find where a generator goes wrong."""
+    return {uci(m): perft(child, depth - 1) for m, child in pos.legal_moves()}
+
+
+# test positions with their known perft values at depth 1, 2, 3, ...
+tests = [
+    (START, [20, 400, 8902, 197281]),
+    ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', [48, 2039, 97862]),
+    ('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812, 43238]),
+    ('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', [6, 264, 9467]),
+    ('rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379]),
+]
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    nodes = 0
+    t0 = time.perf_counter()
+    for fen, counts in tests:
+        pos = Position(fen)
+        for depth, count in enumerate(counts[:max_depth], 1):
+            n = perft(pos, depth)
+            nodes += n
+            print(f'depth {depth}: {n:8} {"ok" if n == count else "expected " + str(count)}  {fen}')
+    dt = time.perf_counter() - t0
+    print(f'{nodes} nodes in {dt:.2f} s: {nodes/dt:.0f} nodes/s')
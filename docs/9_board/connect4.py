@@ -0,0 +1,56 @@
+"""Connect Four against the computer."""
+from app import *
+import game_search
+
+class ConnectFourBoard(Board):
+    """Click a column to drop a red disc, the computer answers with yellow.
+    The search runs in a worker process and is polled once per frame."""
+    def __init__(self, **options):
+        super().__init__(m=6, n=7, dx=50, dy=50,
+                         colors=[Color('white'), Color('red'), Color('yellow')], **options)
+        self.worker = game_search.Worker()
+        self.reset()
+
+    def reset(self):
+        self.game = game_search.ConnectFour()
+        self.Col = self.game.board % 3
+
+    def drop(self, j):
+        self.game.play(j)
+        self.Col = self.game.board % 3
+        if self.game.result() != None:
+            App.scene.set_status('game over')
+
+    def update(self):
+        result = self.worker.poll()
+        if result != None:
+            move, value, depth = result
+            self.drop(move)
+            App.scene.set_status(f'column {move}, value {value} at depth {depth}')
+
+    def do_event(self, event):
+        if event.type == MOUSEBUTTONDOWN and not self.worker.busy() and self.game.result() == None:
+            i, j = self.get_index(*event.pos)
+            if j in self.game.moves():
+                self.drop(j)
+                if self.game.result() == None:
+                    App.scene.set_status('thinking...')
+                    self.worker.start(self.game, limit=1)
+
+class Demo(App):
+    def __init__(self):
+        super().__init__()
+
+        Scene(caption='Connect Four')
+        self.board = ConnectFourBoard()
+        Button('New game', dir=(0, 1), cmd='App.root.board.reset()')
+
+    def run(self):
+        try:
+            super().run()
+        finally:
+            # stop a search which is still running
+            self.board.worker.close()
+
+if __name__ == '__main__':
+    Demo().run()
@@ -0,0 +1,377 @@
+"""Game-tree search for two-player board games.
+
+A game keeps its position in a NumPy array `board` (0 empty, 1 and -1 for
+the two players) and gives its rules through a few methods: moves(),
+play(move), undo(), result() and evaluate(). Setting a cell with set()
+keeps a Zobrist hash of the position up to date.
+
+The search is negamax with alpha-beta pruning and iterative deepening.
+Positions are stored in a transposition table keyed by their hash, and
+the best move found there is tried first, then the moves which caused
+cutoffs most often (history heuristic).
+
+    python game_search.py   # nodes per second for each game
+"""
+
+import multiprocessing
+import random
+import signal
+import time
+
+import numpy as np
+
+WIN = 1000000
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class Game:
+    """The board, hash and player to move of a game on a m x n board, the
+    first player is 1. A subclass gives the rules with these methods:
+
+    moves()     the legal moves of the player to move
+    play(move)  play a move, keep in history what undo() needs, switch()
+    undo()      take back the last move
+    result()    None while the game goes on, else the score for the player
+                to move: -WIN for a loss, 0 for a draw, WIN for a win
+    evaluate()  a heuristic score for the player to move, 0 by default
+    """
+    m, n = 3, 3
+
+    def __init__(self):
+        self.board = np.zeros((self.m, self.n), dtype='int8')
+        self.player = 1
+        self.history = []  # moves played, with what undo() needs
+        rand = random.Random(type(self).__name__)
+        # one key per cell and player, and one for the player to move
+        self.keys = {1: [rand.getrandbits(64) for _ in range(self.m * self.n)],
+                     -1: [rand.getrandbits(64) for _ in range(self.m * self.n)]}
+        self.side_key = rand.getrandbits(64)
+        self.hash = 0
+
+    def set(self, i, j, v):
+        """Set cell (i, j) to v (0, 1 or -1) and update the hash."""
+        old = int(self.board[i, j])
+        if old != 0:
+            self.hash ^= self.keys[old][i * self.n + j]
+        if v != 0:
+            self.hash ^= self.keys[v][i * self.n + j]
+        self.board[i, j] = v
+
+    def switch(self):
+        self.player = -self.player
+        self.hash ^= self.side_key
+
+    def evaluate(self):
+        """Return a heuristic score for the player to move."""
+        return 0
+
+
+class TicTacToe(Game):
+    m, n = 3, 3
+
+    def moves(self):
+        return [tuple(p) for p in np.argwhere(self.board == 0).tolist()]
+
+    def play(self, move):
+        self.set(*move, self.player)
+        self.history.append(move)
+        self.switch()
+
+    def undo(self):
+        self.set(*self.history.pop(), 0)
+        self.switch()
+
+    def result(self):
+        b = self.board
+        sums = np.concatenate((b.sum(axis=0), b.sum(axis=1), [np.trace(b), np.trace(b[:, ::-1])]))
+        if (abs(sums) == 3).any():
+            # the player who just moved has won
+            return -WIN
+        return 0 if len(self.history) == 9 else None
+
+
+class ConnectFour(Game):
+    """Drop discs in the 7 columns, the top row is 0."""
+    m, n = 6, 7
+
+    def __init__(self):
+        super().__init__()
+        self.heights = [0] * self.n
+        # the cells of the 69 windows of 4 in a row, for evaluate()
+        windows = []
+        for i in range(self.m):
+            for j in range(self.n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    cells = [(i + k*di, j + k*dj) for k in range(4)]
+                    if all(0 <= a < self.m and 0 <= b < self.n for a, b in cells):
+                        windows.append([a * self.n + b for a, b in cells])
+        self.windows = np.array(windows)
+        self.weights = np.array([0, 1, 4, 32, 0], dtype=np.int64)
+
+    def moves(self):
+        # center columns first
+        return [j for j in (3, 2, 4, 1, 5, 0, 6) if self.heights[j] < self.m]
+
+    def play(self, j):
+        i = self.m - 1 - self.heights[j]
+        self.heights[j] += 1
+        self.set(i, j, self.player)
+        self.history.append((i, j))
+        self.switch()
+
+    def undo(self):
+        i, j = self.history.pop()
+        self.heights[j] -= 1
+        self.set(i, j, 0)
+        self.switch()
+
+    def result(self):
+        if not self.history:
+            return None
+        i, j = self.history[-1]
+        v = self.board[i, j]
+        b = self.board
+        for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            count = 1
+            for s in (1, -1):
+                a, c = i + s*di, j + s*dj
+                while 0 <= a < self.m and 0 <= c < self.n and b[a, c] == v:
+                    count += 1
+                    a, c = a + s*di, c + s*dj
+            if count >= 4:
+                return -WIN
+        return 0 if len(self.history) == self.m * self.n else None
+
+    def evaluate(self):
+        """Count the windows which only one player can still fill."""
+        cells = self.board.ravel()[self.windows]
+        mine = (cells == self.player).sum(axis=1)
+        theirs = (cells == -self.player).sum(axis=1)
+        score = self.weights[mine[theirs == 0]].sum() - self.weights[theirs[mine == 0]].sum()
+        return int(score)
+
+
+class Othello(Game):
+    """Moves are (i, j) cells, or None to pass when no move flips a disc."""
+    m, n = 8, 8
+    dirs = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+    weights = np.array([[100, -20, 10,  5,  5, 10, -20, 100],
+                        [-20, -50, -2, -2, -2, -2, -50, -20],
+                        [ 10,  -2,  1,  1,  1,  1,  -2,  10],
+                        [  5,  -2,  1,  0,  0,  1,  -2,   5],
+                        [  5,  -2,  1,  0,  0,  1,  -2,   5],
+                        [ 10,  -2,  1,  1,  1,  1,  -2,  10],
+                        [-20, -50, -2, -2, -2, -2, -50, -20],
+                        [100, -20, 10,  5,  5, 10, -20, 100]])
+
+    def __init__(self):
+        super().__init__()
+        self.set(3, 3, -1)
+        self.set(4, 4, -1)
+        self.set(3, 4, 1)
+        self.set(4, 3, 1)
+
+    def flips(self, i, j, player, b=None):
+        """Return the cells flipped by player at (i, j), b is the board as lists."""
+        if b == None:
+            b = self.board.tolist()
+        result = []
+        for di, dj in self.dirs:
+            a, c = i + di, j + dj
+            line = []
+            while 0 <= a < 8 and 0 <= c < 8 and b[a][c] == -player:
+                line.append((a, c))
+                a, c = a + di, c + dj
+            if line and 0 <= a < 8 and 0 <= c < 8 and b[a][c] == player:
+                result.extend(line)
+        return result
+
+    def legal(self, player):
+        b = self.board.tolist()
+        moves = []
+        for i in range(8):
+            for j in range(8):
+                if b[i][j] == 0 and self.flips(i, j, player, b):
+                    moves.append((i, j))
+        return moves
+
+    def moves(self):
+        moves = self.legal(self.player)
+        return moves if moves else [None]
+
+    def play(self, move):
+        flipped = []
+        if move != None:
+            flipped = self.flips(*move, self.player)
+            self.set(*move, self.player)
+            for a, c in flipped:
+                self.set(a, c, self.player)
+        self.history.append((move, flipped))
+        self.switch()
+
+    def undo(self):
+        move, flipped = self.history.pop()
+        self.switch()
+        if move != None:
+            self.set(*move, 0)
+            for a, c in flipped:
+                self.set(a, c, -self.player)
+
+    def result(self):
+        # the game ends when the board is full or both players pass
+        passes = len(self.history) >= 2 and self.history[-1][0] == None and self.history[-2][0] == None
+        if not passes and (self.board == 0).any():
+            return None
+        diff = int(self.board.sum()) * self.player
+        return WIN if diff > 0 else -WIN if diff < 0 else 0
+
+    def evaluate(self):
+        return int((self.weights * self.board).sum()) * self.player
+
+
+class Timeout(Exception):
+    pass
+
+
+class Search:
+    """Alpha-beta search with a transposition table, shared between searches."""
+
+    def __init__(self, table_size=1 << 20):
+        self.table = {}    # hash -> (depth, value, flag, best move)
+        self.table_size = table_size
+        self.history = {}  # move -> cutoff score, for move ordering
+        self.nodes = 0
+        self.deadline = None
+
+    def negamax(self, game, depth, alpha, beta):
+        self.nodes += 1
+        if self.deadline and self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+        alpha0 = alpha
+        best_move = None
+        entry = self.table.get(game.hash)
+        if entry != None:
+            d, v, flag, best_move = entry
+            if d >= depth:
+                if flag == EXACT:
+                    return v
+                if flag == LOWER:
+                    alpha = max(alpha, v)
+                else:
+                    beta = min(beta, v)
+                if alpha >= beta:
+                    return v
+
+        result = game.result()
+        if result != None:
+            return result
+        if depth == 0:
+            return game.evaluate()
+
+        best = -WIN - 1
+        for move in self.order(game.moves(), best_move):
+            game.play(move)
+            v = -self.negamax(game, depth - 1, -beta, -alpha)
+            game.undo()
+            if v > best:
+                best, best_move = v, move
+                if v > alpha:
+                    alpha = v
+                    if alpha >= beta:
+                        self.history[move] = self.history.get(move, 0) + depth * depth
+                        break
+
+        flag = UPPER if best <= alpha0 else LOWER if best >= beta else EXACT
+        if len(self.table) >= self.table_size:
+            self.table.clear()
+        self.table[game.hash] = depth, best, flag, best_move
+        return best
+
+    def order(self, moves, first=None):
+        moves = sorted(moves, key=lambda m: -self.history.get(m, 0))
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def best_move(self, game, depth=64, limit=None):
+        """Search deeper and deeper until depth or the time limit (in seconds).
+        Return (move, value, depth reached)."""
+        self.deadline = None if limit == None else time.perf_counter() + limit
+        n = len(game.history)
+        moves = game.moves()
+        best = moves[0], 0, 0
+        for d in range(1, depth + 1):
+            try:
+                alpha, best_move = -WIN - 1, moves[0]
+                for move in self.order(moves, best[0]):
+                    game.play(move)
+                    v = -self.negamax(game, d - 1, -WIN - 1, -alpha)
+                    game.undo()
+                    if v > alpha:
+                        alpha, best_move = v, move
+            except Timeout:
+                # restore the position, the moves played are still on the stack
+                while len(game.history) > n:
+                    game.undo()
+                break
+            best = best_move, alpha, d
+            if abs(alpha) >= WIN:
+                break
+        self.deadline = None
+        return best
+
+
+def best_move(game, depth=64, limit=None):
+    """Return (move, value, depth) for the player to move."""
+    return Search().best_move(game, depth, limit)
+
+
+def init_worker():
+    """Restore the default signal handlers in a worker process."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+
+class Worker:
+    """Search in a separate process, so the UI keeps its frame rate.
+    start() begins a search, poll() returns its result once it is ready, else None.
+    The process is spawned, not forked, so that it does not inherit the
+    state of pygame and SDL (such as its SIGTERM handler): call close() on quit."""
+
+    def __init__(self):
+        self.pool = None
+        self.job = None
+
+    def start(self, game, depth=64, limit=1):
+        if self.pool == None:
+            context = multiprocessing.get_context('spawn')
+            self.pool = context.Pool(1, initializer=init_worker)
+        self.job = self.pool.apply_async(best_move, (game, depth, limit))
+
+    def busy(self):
+        return self.job != None
+
+    def poll(self):
+        if self.job != None and self.job.ready():
+            job, self.job = self.job, None
+            return job.get()
+        return None
+
+    def close(self):
+        """Stop the worker process, also in the middle of a search."""
+        if self.pool != None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self.job = None
+
+
+if __name__ == '__main__':
+    for game, depth in ((TicTacToe(), 9), (ConnectFour(), 9), (Othello(), 8)):
+        search = Search()
+        t0 = time.perf_counter()
+        move, value, d = search.best_move(game, depth)
+        dt = time.perf_counter() - t0
+        print(f'{type(game).__name__:12} depth {d}: move {move} value {value}, '
+              f'{search.nodes} nodes in {dt:.2f} s, {search.nodes/dt:.0f} nodes/s')
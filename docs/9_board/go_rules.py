@@ -0,0 +1,275 @@
+"""Go rules engine.
+
+Stones of the same color which touch form a chain. Each point knows the
+root of its chain, and each root keeps the list of its stones and the set
+of its liberties, so a move only looks at its 4 neighbors: chains are merged
+by moving the smaller list into the larger one, and captured chains are
+removed stone by stone. A Zobrist hash of the position detects superko.
+
+Replay a game record, or benchmark a random game:
+
+    python go_rules.py [game.sgf]
+"""
+
+import random
+import re
+
+import numpy as np
+
+EMPTY, BLACK, WHITE = 0, 1, 2
+
+
+class Game:
+    """A Go game on a n x n board. Points are (i, j) tuples, None is a pass."""
+
+    def __init__(self, n=19, komi=6.5, superko=True, suicide=False, seed=0):
+        self.n = n
+        self.komi = komi
+        self.superko = superko    # forbid any repeated position, otherwise simple ko
+        self.suicide = suicide    # allow suicide of a chain of more than one stone
+        self.board = [EMPTY] * (n*n)
+        self.chain = [-1] * (n*n)  # root of the chain of each stone
+        self.stones = {}           # root -> list of points
+        self.libs = {}             # root -> set of points
+
+        self.neighbors = []
+        for i in range(n):
+            for j in range(n):
+                nb = [(i+di) * n + j+dj for di, dj in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                      if 0 <= i+di < n and 0 <= j+dj < n]
+                self.neighbors.append(nb)
+
+        rand = random.Random(seed)
+        self.zobrist = [None, [rand.getrandbits(64) for _ in range(n*n)],
+                              [rand.getrandbits(64) for _ in range(n*n)]]
+        self.hash = 0
+        self.hashes = {0}
+        self.ko = None             # point forbidden by simple ko
+        self.color = BLACK         # color to play
+        self.captures = [0, 0, 0]  # stones captured by each color
+        self.moves = []
+        self.passes = 0
+
+    def point(self, c):
+        return divmod(c, self.n)
+
+    def check(self, c, color):
+        """Return the roots of the chains captured by playing color at point c,
+        raise ValueError if the move is illegal."""
+        board = self.board
+        if board[c] != EMPTY:
+            raise ValueError(f'{self.point(c)} is occupied')
+        other = 3 - color
+        captured = []
+        free = False  # the new chain will have a liberty
+        for k in self.neighbors[c]:
+            v = board[k]
+            if v == EMPTY:
+                free = True
+            elif v == color:
+                if len(self.libs[self.chain[k]]) > 1:
+                    free = True
+            else:
+                r = self.chain[k]
+                if len(self.libs[r]) == 1 and r not in captured:
+                    captured.append(r)
+        if not free and not captured:
+            alone = all(board[k] != color for k in self.neighbors[c])
+            if alone or not self.suicide:
+                raise ValueError(f'{self.point(c)} is suicide')
+        if self.superko:
+            h = self.hash ^ self.zobrist[color][c]
+            for r in captured:
+                for s in self.stones[r]:
+                    h ^= self.zobrist[other][s]
+            if h in self.hashes:
+                raise ValueError(f'{self.point(c)} repeats a position')
+        elif c == self.ko:
+            raise ValueError(f'{self.point(c)} is ko')
+        return captured
+
+    def is_legal(self, p, color=None):
+        if p == None:
+            return True
+        try:
+            self.check(p[0] * self.n + p[1], color or self.color)
+        except ValueError:
+            return False
+        return True
+
+    def play(self, p, color=None):
+        """Play color (by default the color to play) at point p, or pass if p is None.
+        Raise ValueError if the move is illegal."""
+        color = color or self.color
+        if p == None:
+            self.passes += 1
+            self.ko = None
+        else:
+            # an illegal move raises before the game changes
+            self.place(p[0] * self.n + p[1], color)
+            self.passes = 0
+        self.moves.append((color, p))
+        self.color = 3 - color
+
+    def place(self, c, color):
+        captured = self.check(c, color)
+        board, chain, libs, stones = self.board, self.chain, self.libs, self.stones
+        other = 3 - color
+
+        board[c] = color
+        chain[c] = c
+        stones[c] = [c]
+        libs[c] = {k for k in self.neighbors[c] if board[k] == EMPTY}
+        self.hash ^= self.zobrist[color][c]
+
+        root = c
+        for k in self.neighbors[c]:
+            v = board[k]
+            if v == other:
+                libs[chain[k]].discard(c)
+            elif v == color and chain[k] != root:
+                root = self.merge(root, chain[k])
+        libs[root].discard(c)
+
+        n_captured = 0
+        for r in captured:
+            n_captured += len(stones[r])
+            self.remove(r)
+        self.captures[color] += n_captured
+
+        if not libs[root]:
+            # suicide of a chain, allowed by the rules
+            self.captures[other] += len(stones[root])
+            self.remove(root)
+
+        # simple ko: a single stone captured a single stone and has one liberty
+        self.ko = None
+        if n_captured == 1 and len(stones.get(root, ())) == 1 and len(libs[root]) == 1:
+            self.ko = next(iter(libs[root]))
+        self.hashes.add(self.hash)
+
+    def merge(self, a, b):
+        """Merge the chains with roots a and b, return the new root."""
+        if len(self.stones[a]) < len(self.stones[b]):
+            a, b = b, a
+        for s in self.stones[b]:
+            self.chain[s] = a
+        self.stones[a].extend(self.stones.pop(b))
+        self.libs[a] |= self.libs.pop(b)
+        return a
+
+    def remove(self, r):
+        """Remove the chain with root r from the board."""
+        board, chain, libs = self.board, self.chain, self.libs
+        color = board[r]
+        z = self.zobrist[color]
+        stones = self.stones.pop(r)
+        del libs[r]
+        for s in stones:
+            board[s] = EMPTY
+            chain[s] = -1
+            self.hash ^= z[s]
+        for s in stones:
+            for k in self.neighbors[s]:
+                if board[k] != EMPTY:
+                    libs[chain[k]].add(s)
+
+    def liberties(self, p):
+        """Return the number of liberties of the chain at point p."""
+        r = self.chain[p[0] * self.n + p[1]]
+        return 0 if r < 0 else len(self.libs[r])
+
+    def to_array(self):
+        return np.array(self.board, dtype='int8').reshape(self.n, self.n)
+
+    def territory(self):
+        """Return the boolean arrays of the empty points which only black and
+        only white can reach, by growing the stones through empty points."""
+        a = self.to_array()
+        empty = a == EMPTY
+        result = []
+        for color in (BLACK, WHITE):
+            reach = a == color
+            while True:
+                grown = reach.copy()
+                grown[1:] |= reach[:-1]
+                grown[:-1] |= reach[1:]
+                grown[:, 1:] |= reach[:, :-1]
+                grown[:, :-1] |= reach[:, 1:]
+                grown &= empty | (a == color)
+                if (grown == reach).all():
+                    break
+                reach = grown
+            result.append(reach & empty)
+        black, white = result
+        return black & ~white, white & ~black
+
+    def score(self):
+        """Return the area score (black, white): stones plus territory, and komi."""
+        a = self.to_array()
+        black, white = self.territory()
+        return (int((a == BLACK).sum() + black.sum()),
+                int((a == WHITE).sum() + white.sum()) + self.komi)
+
+
+def sgf_moves(text):
+    """Yield the (color, point) moves of a SGF game record."""
+    for color, coords in re.findall(r';\s*([BW])\[(\w*)\]', text):
+        color = BLACK if color == 'B' else WHITE
+        if coords in ('', 'tt'):
+            yield color, None
+        else:
+            yield color, (ord(coords[1]) - 97, ord(coords[0]) - 97)
+
+def sgf_size(text):
+    m = re.search(r'SZ\[(\d+)\]', text)
+    return int(m.group(1)) if m else 19
+
+def replay(moves, n=19, **options):
+    """Play a sequence of (color, point) moves and return the game."""
+    game = Game(n, **options)
+    for color, p in moves:
+        game.play(p, color)
+    return game
+
+def random_game(n=19, length=None, seed=0):
+    """Return the moves of a random game, without filling single-point eyes."""
+    rand = random.Random(seed)
+    game = Game(n)
+    length = length or 2 * n * n
+    points = [(i, j) for i in range(n) for j in range(n)]
+    while len(game.moves) < length:
+        rand.shuffle(points)
+        for i, j in points:
+            c = i * n + j
+            eye = all(game.board[k] == game.color for k in game.neighbors[c])
+            if game.board[c] == EMPTY and not eye and game.is_legal((i, j)):
+                game.play((i, j))
+                break
+        else:
+            game.play(None)
+            if game.passes == 2:
+                break
+    return game.moves
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    if len(sys.argv) > 1:
+        text = open(sys.argv[1]).read()
+        moves = list(sgf_moves(text))
+        n = sgf_size(text)
+    else:
+        n = 19
+        moves = random_game(n)
+
+    t0 = time.perf_counter()
+    repeat = max(1, 100000 // len(moves))
+    for _ in range(repeat):
+        game = replay(moves, n)
+    dt = time.perf_counter() - t0
+    print(game.to_array())
+    print(f'{len(moves)} moves, captures {game.captures[1:]}, score {game.score()}')
+    print(f'{repeat * len(moves) / dt:.0f} moves/s')
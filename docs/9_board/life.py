@@ -0,0 +1,14 @@
+"""Game of Life on a large board."""
+from app import *
+
+class Demo(App):
+    def __init__(self):
+        super().__init__(size=(800, 600))
+
+        Scene(caption='Life - space: run, s: step, r: random, wheel: zoom, drag: pan')
+        life = Life(m=2048, n=2048, size=(760, 520))
+        life.randomize()
+        life.running = True
+
+if __name__ == '__main__':
+    Demo().run()
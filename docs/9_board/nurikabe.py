@@ -1,5 +1,6 @@
 """Nurikabe puzzle game."""
 from app import *
+import nurikabe_solver
 
 # https://en.wikipedia.org/wiki/Nurikabe_(puzzle)
 nurikabe1 = """
@@ -23,18 +24,69 @@ nurikabe2 = """
 .2...
 """
 
+class NurikabeBoard(Board):
+    """A board whose cells are clicked to cycle between unknown, sea and island.
+    Col holds the state of the cells, each edit is checked incrementally."""
+    def __init__(self, puzzle, **options):
+        super().__init__(**options)
+        self.colors = [Color('white'), Color('black'), Color('lightyellow')]
+        self.set_Num(puzzle)
+        self.reset()
+
+    def reset(self):
+        self.position = nurikabe_solver.Nurikabe(self.Num0)
+        self.Col = self.position.state.astype('int8')
+
+    def do_event(self, event):
+        super().do_event(event)
+        if event.type == MOUSEBUTTONDOWN and self.selection:
+            i, j = self.selection[0]
+            if self.Num0[i, j] == 0:
+                self.position.set(i, j, (self.Col[i, j] + 1) % 3)
+                self.Col[i, j] = self.position.state[i, j]
+                self.dirty = True
+                self.check()
+
+    def check(self):
+        errors = self.position.errors()
+        if errors:
+            reason, cells = errors[0]
+            App.scene.set_status(f'{reason} at {cells[0]}')
+        else:
+            App.scene.set_status('solved' if self.position.is_solved() else 'no error')
+
+    def solve(self):
+        state = nurikabe_solver.solve(self.Num0)
+        if state is None:
+            App.scene.set_status('no solution')
+        else:
+            self.position = nurikabe_solver.Nurikabe(self.Num0, state)
+            self.Col = state.astype('int8')
+            App.scene.set_status('solved')
+
 class Demo(App):
     def __init__(self):
         super().__init__()
 
         Scene(caption='Nurikabe')
-        n = Board(dx=20, dy=20, m=9, n=10, checker=(Color('white'), Color('white')))
-        n.set_Num(nurikabe1)
-        n.render()
-    
-        n2 = Board(dx=40, dy=40, m=5, n=5, dir=(1, 0))
-        n2.set_Num(nurikabe2)
-        n2.render()
+        self.boards = [NurikabeBoard(nurikabe1, dx=20, dy=20, m=9, n=10),
+                       NurikabeBoard(nurikabe2, dx=40, dy=40, m=5, n=5, dir=(1, 0))]
+
+        Button('Reset', dir=(0, 1), cmd='App.root.reset()')
+        Button('Check', cmd='App.root.check()')
+        Button('Solve', cmd='App.root.solve()')
+
+    def reset(self):
+        for board in self.boards:
+            board.reset()
+
+    def check(self):
+        for board in self.boards:
+            board.check()
+
+    def solve(self):
+        for board in self.boards:
+            board.solve()
 
 if __name__ == '__main__':
     Demo().run()
\ No newline at end of file
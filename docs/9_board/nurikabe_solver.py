@@ -0,0 +1,282 @@
+"""Nurikabe checker and solver.
+
+A puzzle is an array of clues (0 for no clue). A position gives each cell a
+state: UNKNOWN, SEA (shaded) or ISLAND (unshaded), clue cells are island.
+The rules: every island holds exactly one clue, which is its size, the sea
+is connected, and there is no 2x2 pool of sea.
+
+    python nurikabe_solver.py   # solves the puzzles of nurikabe.py
+"""
+
+import copy
+
+import numpy as np
+
+from pathfinding import label
+
+UNKNOWN, SEA, ISLAND = 0, 1, 2
+
+
+def pools(state):
+    """Return a boolean array, True at the top-left cell of each 2x2 pool."""
+    sea = state == SEA
+    return sea[:-1, :-1] & sea[1:, :-1] & sea[:-1, 1:] & sea[1:, 1:]
+
+def check(clues, state):
+    """Check a complete position with whole-array operations, return True if solved."""
+    clues = np.asarray(clues)
+    state = np.where(clues > 0, ISLAND, state)
+    if (state == UNKNOWN).any() or pools(state).any():
+        return False
+    _, n_sea = label(state == SEA)
+    if n_sea > 1:
+        return False
+    islands, n = label(state == ISLAND)
+    size = np.bincount(islands[islands >= 0], minlength=n)
+    n_clues = np.bincount(islands[clues > 0], minlength=n)
+    total = np.bincount(islands[clues > 0], weights=clues[clues > 0], minlength=n)
+    return bool((n_clues == 1).all() and (total == size).all())
+
+
+class Component:
+    """A connected group of sea or island cells."""
+
+    def __init__(self, kind, cells, clues, unknown):
+        self.kind = kind
+        self.cells = cells      # flat cell indices
+        self.clues = clues      # clue values in the component
+        self.unknown = unknown  # flat indices of the unknown neighbors
+
+    def is_closed(self):
+        return len(self.unknown) == 0
+
+    def target(self):
+        """Return the island size given by its clue, or 0."""
+        return self.clues[0] if len(self.clues) == 1 else 0
+
+
+class Nurikabe:
+    """A position whose components are kept up to date cell by cell:
+    setting a cell labels again only the components around it."""
+
+    def __init__(self, clues, state=None):
+        self.clues = np.array(clues, dtype=int)
+        self.m, self.n = self.clues.shape
+        if state is None:
+            state = np.zeros_like(self.clues)
+        self.state = np.where(self.clues > 0, ISLAND, state)
+        self.n_sea = self.clues.size - self.clues.sum()  # sea cells in a solution
+
+        # neighbors of each flat cell index
+        self.neighbors = []
+        for i in range(self.m):
+            for j in range(self.n):
+                nb = [(i+di) * self.n + j+dj for di, dj in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                      if 0 <= i+di < self.m and 0 <= j+dj < self.n]
+                self.neighbors.append(nb)
+
+        # label all components at once
+        self.labels = np.full(self.clues.size, -1)
+        self.comps = {}
+        self.next_label = 0
+        for kind in (SEA, ISLAND):
+            labels, k = label(self.state == kind)
+            if k == 0:
+                continue
+            flat = labels.ravel()
+            for cells in np.split(np.argsort(flat, kind='stable')[np.sum(flat < 0):],
+                                  np.cumsum(np.bincount(flat[flat >= 0], minlength=k))[:-1]):
+                self.add_component(kind, cells.tolist())
+        self.pools = set(map(tuple, np.argwhere(pools(self.state)).tolist()))
+
+    def add_component(self, kind, cells):
+        state = self.state.ravel()
+        clues = self.clues.ravel()
+        unknown = {k for c in cells for k in self.neighbors[c] if state[k] == UNKNOWN}
+        comp = Component(kind, cells, [clues[c] for c in cells if clues[c] > 0], unknown)
+        self.comps[self.next_label] = comp
+        self.labels[cells] = self.next_label
+        self.next_label += 1
+
+    def flood(self, start):
+        """Return the cells connected to start with the same state."""
+        state = self.state.ravel()
+        kind = state[start]
+        cells = [start]
+        seen = {start}
+        for c in cells:
+            for k in self.neighbors[c]:
+                if k not in seen and state[k] == kind:
+                    seen.add(k)
+                    cells.append(k)
+        return cells
+
+    def set(self, i, j, s):
+        """Set the state of cell (i, j) and update the affected components and pools."""
+        c = i * self.n + j
+        if self.clues[i, j] > 0 or self.state[i, j] == s:
+            return
+        seeds = [c] + self.neighbors[c]
+        for label in {self.labels[k] for k in seeds if self.labels[k] >= 0}:
+            comp = self.comps.pop(label)
+            self.labels[comp.cells] = -1
+
+        self.state[i, j] = s
+        state = self.state.ravel()
+        for k in seeds:
+            if self.labels[k] < 0 and state[k] != UNKNOWN:
+                self.add_component(state[k], self.flood(k))
+
+        for a in (i-1, i):
+            for b in (j-1, j):
+                if 0 <= a < self.m-1 and 0 <= b < self.n-1:
+                    if (self.state[a:a+2, b:b+2] == SEA).all():
+                        self.pools.add((a, b))
+                    else:
+                        self.pools.discard((a, b))
+
+    def errors(self):
+        """Return a list of (reason, cells) for the rules which are broken.
+        Unknown cells are counted as open: only definite errors are given."""
+        errors = [('pool', [(a, b), (a+1, b), (a, b+1), (a+1, b+1)]) for a, b in self.pools]
+        seas = [comp for comp in self.comps.values() if comp.kind == SEA]
+        for comp in self.comps.values():
+            cells = [divmod(c, self.n) for c in comp.cells]
+            if comp.kind == ISLAND:
+                if len(comp.clues) > 1:
+                    errors.append(('island with several clues', cells))
+                elif comp.clues and len(comp.cells) > comp.clues[0]:
+                    errors.append(('island too large', cells))
+                elif comp.is_closed() and (not comp.clues or len(comp.cells) < comp.clues[0]):
+                    errors.append(('island too small', cells))
+            elif len(seas) > 1 and comp.is_closed():
+                errors.append(('sea not connected', cells))
+        return errors
+
+    def is_solved(self):
+        return not (self.state == UNKNOWN).any() and not self.errors()
+
+    def contradiction(self):
+        """Check the errors, and the number of sea cells."""
+        return bool(self.errors()) or (self.state == SEA).sum() > self.n_sea
+
+    def deductions(self):
+        """Return a list of (cell, state) which follow from the rules."""
+        state = self.state.ravel()
+        moves = {}
+        islands = [comp for comp in self.comps.values() if comp.kind == ISLAND]
+        for comp in self.comps.values():
+            if comp.kind == ISLAND:
+                t = comp.target()
+                if t and len(comp.cells) == t:
+                    # a complete island is surrounded by sea
+                    moves.update((c, SEA) for c in comp.unknown)
+                elif len(comp.unknown) == 1 and len(comp.clues) <= 1:
+                    # an incomplete island with a single way out
+                    moves.update((c, ISLAND) for c in comp.unknown)
+            elif len(comp.unknown) == 1 and len(comp.cells) < self.n_sea:
+                # a sea with a single way out
+                moves.update((c, SEA) for c in comp.unknown)
+
+        # a cell between two islands with clues is sea
+        owner = {}
+        for label, comp in self.comps.items():
+            if comp.kind == ISLAND and comp.clues:
+                for c in comp.unknown:
+                    owner.setdefault(c, set()).add(label)
+        moves.update((c, SEA) for c, labels in owner.items() if len(labels) > 1)
+
+        # a cell which no incomplete island can reach is sea
+        reach = self.reachable(islands)
+        for c in np.flatnonzero(state == UNKNOWN).tolist():
+            if c not in reach:
+                moves[c] = SEA
+
+        # the last cell of a 2x2 block of sea is island
+        sea = self.state == SEA
+        for a in range(self.m - 1):
+            for b in range(self.n - 1):
+                block = self.state[a:a+2, b:b+2]
+                if sea[a:a+2, b:b+2].sum() == 3 and (block == UNKNOWN).any():
+                    di, dj = np.argwhere(block == UNKNOWN)[0]
+                    moves[(a+di) * self.n + b+dj] = ISLAND
+        return [(divmod(c, self.n), s) for c, s in moves.items()]
+
+    def reachable(self, islands):
+        """Return the unknown cells which an incomplete island can still reach."""
+        state = self.state.ravel()
+        reach = set()
+        for comp in islands:
+            t = comp.target()
+            if not t:
+                continue
+            frontier = list(comp.unknown)
+            dist = {c: 1 for c in frontier}
+            for c in frontier:
+                if dist[c] > t - len(comp.cells):
+                    continue
+                # do not join another island with a clue
+                if any(self.labels[k] >= 0 and self.labels[k] != self.labels[comp.cells[0]]
+                       and self.comps[self.labels[k]].kind == ISLAND and self.comps[self.labels[k]].clues
+                       for k in self.neighbors[c]):
+                    continue
+                reach.add(c)
+                for k in self.neighbors[c]:
+                    if state[k] != SEA and k not in dist:
+                        dist[k] = dist[c] + 1
+                        frontier.append(k)
+        return reach
+
+    def propagate(self):
+        """Apply the deductions until none is left, return False on a contradiction."""
+        while True:
+            if self.contradiction():
+                return False
+            moves = self.deductions()
+            if not moves:
+                return True
+            for (i, j), s in moves:
+                self.set(i, j, s)
+
+
+def solve(clues):
+    """Return the solved state array, or None."""
+    position = Nurikabe(clues)
+    result = search(position)
+    return None if result is None else result.state
+
+def search(position):
+    if not position.propagate():
+        return None
+    unknown = np.argwhere(position.state == UNKNOWN)
+    if len(unknown) == 0:
+        return position if position.is_solved() else None
+    # try a cell next to an island first
+    i, j = unknown[0]
+    for comp in sorted(position.comps.values(), key=lambda comp: len(comp.unknown)):
+        if comp.kind == ISLAND and comp.unknown:
+            i, j = divmod(min(comp.unknown), position.n)
+            break
+    for s in (ISLAND, SEA):
+        p = copy.deepcopy(position)
+        p.set(i, j, s)
+        result = search(p)
+        if result is not None:
+            return result
+    return None
+
+
+if __name__ == '__main__':
+    import time
+    from app import PuzzlePack
+    from nurikabe import nurikabe1, nurikabe2
+
+    for text in (nurikabe1, nurikabe2):
+        lines = text.split()
+        clues = PuzzlePack.parse(''.join(lines).encode(), len(lines), len(lines[0]))[0]
+        t0 = time.perf_counter()
+        state = solve(clues)
+        dt = time.perf_counter() - t0
+        print(f'{clues.shape} solved in {dt:.3f} s: {check(clues, state)}')
+        for i, row in enumerate(state):
+            print(' '.join(str(clues[i, j]) if clues[i, j] else '?#.'[s] for j, s in enumerate(row)))
@@ -0,0 +1,297 @@
+"""Pathfinding and flood fill on board arrays.
+
+The functions take a boolean array `free` of the cells which can be
+entered, for example `board.T == 0` for boardgames.Board or `board.Num == 0`
+for app.Board. Cells are (i, j) tuples.
+
+Distance fields grow by wavefronts: the frontier is an array of cell
+indices into a grid padded with a wall, so that each step looks at all the
+neighbors of the frontier at once, without bounds checks.
+
+    python pathfinding.py   # benchmarks on a 1000x1000 grid
+"""
+
+import heapq
+
+import numpy as np
+
+UNREACHED = -1
+
+
+def pad(free):
+    """Return the padded flat free array and the offsets of the 4 and 8 neighbors."""
+    m, n = free.shape
+    padded = np.zeros((m+2, n+2), dtype=bool)
+    padded[1:-1, 1:-1] = free
+    w = n + 2
+    return padded.ravel(), np.array([-w, w, -1, 1]), np.array([-w, w, -1, 1, -w-1, -w+1, w-1, w+1])
+
+def to_flat(cells, n):
+    """Return the padded flat indices of a list of cells."""
+    cells = np.array(cells, dtype=np.int64).reshape(-1, 2)
+    return (cells[:, 0] + 1) * (n+2) + cells[:, 1] + 1
+
+def unpad(flat, shape):
+    """Return the inner m x n part of a padded flat array."""
+    m, n = shape
+    return flat.reshape(m+2, n+2)[1:-1, 1:-1]
+
+def distances(free, sources, diagonal=False):
+    """Return the number of steps from the nearest source to each cell (BFS),
+    UNREACHED for the cells which cannot be reached."""
+    m, n = free.shape
+    passable, four, eight = pad(free)
+    offsets = eight if diagonal else four
+    dist = np.full(passable.size, UNREACHED, dtype=np.int32)
+    frontier = np.unique(to_flat(sources, n))
+    dist[frontier] = 0
+    d = 0
+    while frontier.size:
+        d += 1
+        nb = (frontier[:, None] + offsets).ravel()
+        nb = nb[passable[nb] & (dist[nb] == UNREACHED)]
+        frontier = np.unique(nb)
+        dist[frontier] = d
+    return unpad(dist, (m, n)).copy()
+
+def flood_fill(free, start, diagonal=False):
+    """Return the boolean mask of the cells connected to start."""
+    return distances(free, [start], diagonal) >= 0
+
+def dijkstra(cost, sources, diagonal=False, delta=None):
+    """Return the cheapest cost to reach each cell from the nearest source,
+    where entering a cell costs cost[i, j] (np.inf for walls).
+    The pending cells closer than a bound are relaxed together, the bound
+    moves on by delta (delta-stepping, by default 8 times the median cost).
+    delta is at least the smallest positive cost, so that the bound moves
+    on when most cells cost nothing."""
+    m, n = cost.shape
+    passable, four, eight = pad(np.isfinite(cost))
+    offsets = eight if diagonal else four
+    c = np.full((m+2, n+2), np.inf)
+    c[1:-1, 1:-1] = cost
+    c = c.ravel()
+    finite = cost[np.isfinite(cost)]
+    positive = finite[finite > 0]
+    smallest = float(positive.min()) if positive.size else 1.0
+    if delta == None:
+        delta = 8 * float(np.median(finite)) if finite.size else smallest
+    delta = max(delta, smallest)
+    dist = np.full(passable.size, np.inf)
+    pending = np.unique(to_flat(sources, n))
+    dist[pending] = 0
+    bound = delta
+    while pending.size:
+        near = dist[pending] < bound
+        if not near.any():
+            bound = dist[pending].min() + delta
+            continue
+        active, pending = pending[near], pending[~near]
+        nb = (active[:, None] + offsets).ravel()
+        d = np.repeat(dist[active], len(offsets)) + c[nb]
+        better = passable[nb] & (d < dist[nb])
+        nb, d = nb[better], d[better]
+        # keep the smallest distance for each cell
+        order = np.lexsort((d, nb))
+        nb, d = nb[order], d[order]
+        first = np.ones(nb.size, dtype=bool)
+        first[1:] = nb[1:] != nb[:-1]
+        nb, d = nb[first], d[first]
+        dist[nb] = d
+        pending = np.union1d(pending, nb)
+    return unpad(dist, (m, n)).copy()
+
+def descend(dist, start, diagonal=False):
+    """Follow a distance field downhill from start to a cell at distance 0,
+    return the path. Cells which cost nothing make flat areas, which are
+    crossed by a BFS to a cell with a lower neighbor."""
+    m, n = dist.shape
+    start = tuple(start)
+    if dist[start] < 0 or not np.isfinite(dist[start]):
+        return None
+    dirs = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    if diagonal:
+        dirs += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+    path = [start]
+    i, j = start
+    while dist[i, j] > 0:
+        best = None
+        for di, dj in dirs:
+            a, b = i + di, j + dj
+            if 0 <= a < m and 0 <= b < n and 0 <= dist[a, b] < dist[i, j]:
+                if best == None or dist[a, b] < dist[best]:
+                    best = a, b
+        if best == None:
+            flat = cross_flat(dist, (i, j), dirs)
+            if flat == None:
+                return None
+            path.extend(flat)
+            i, j = flat[-1]
+        else:
+            i, j = best
+            path.append(best)
+    return path
+
+def cross_flat(dist, start, dirs):
+    """Return the cells after start to the nearest cell at the same distance
+    which has a lower neighbor, or None."""
+    m, n = dist.shape
+    d = dist[start]
+    parent = {start: None}
+    cells = [start]
+    for c in cells:
+        i, j = c
+        for di, dj in dirs:
+            a, b = i + di, j + dj
+            if not (0 <= a < m and 0 <= b < n):
+                continue
+            if 0 <= dist[a, b] < d and c != start:
+                path = []
+                while c != start:
+                    path.append(c)
+                    c = parent[c]
+                return path[::-1]
+            if dist[a, b] == d and (a, b) not in parent:
+                parent[a, b] = c
+                cells.append((a, b))
+    return None
+
+def shortest_path(free, start, goal, diagonal=False):
+    """Return the list of cells from start to goal, or None, using a BFS field from goal."""
+    return descend(distances(free, [goal], diagonal), start, diagonal)
+
+def astar(free, start, goal, cost=None, diagonal=False):
+    """Return the cheapest path from start to goal with A*, or None.
+    The heuristic is the Manhattan distance (Chebyshev with diagonal moves)
+    times the smallest cell cost."""
+    m, n = free.shape
+    passable, four, eight = pad(free)
+    offsets = (eight if diagonal else four).tolist()
+    w = n + 2
+    if cost is None:
+        c = [1.0] * passable.size
+        c_min = 1.0
+    else:
+        cp = np.zeros((m+2, n+2))
+        cp[1:-1, 1:-1] = cost
+        c = cp.ravel().tolist()
+        c_min = float(cost[free].min()) if free.any() else 1.0
+    passable = passable.tolist()
+    s, g = (start[0]+1) * w + start[1]+1, (goal[0]+1) * w + goal[1]+1
+    gi, gj = divmod(g, w)
+
+    def h(k):
+        di, dj = abs(k // w - gi), abs(k % w - gj)
+        return (max(di, dj) if diagonal else di + dj) * c_min
+
+    best = {s: 0.0}
+    parent = {s: None}
+    heap = [(h(s), 0.0, s)]
+    while heap:
+        f, d, k = heapq.heappop(heap)
+        if k == g:
+            path = []
+            while k != None:
+                path.append(divmod(k, w))
+                k = parent[k]
+            return [(i-1, j-1) for i, j in reversed(path)]
+        if d > best[k]:
+            continue
+        for o in offsets:
+            nb = k + o
+            if passable[nb]:
+                d2 = d + c[nb]
+                if d2 < best.get(nb, np.inf):
+                    best[nb] = d2
+                    parent[nb] = k
+                    heapq.heappush(heap, (d2 + h(nb), d2, nb))
+    return None
+
+def label(mask):
+    """Label the 4-connected components of a boolean array with NumPy, as a
+    vectorized union-find: the root of each cell is hooked to the smallest
+    root of its neighbors, then the paths are compressed, until nothing
+    changes. Return the labels (-1 outside the mask) and the number of
+    components."""
+    m, n = mask.shape
+    cells = np.flatnonzero(mask)
+    parent = np.arange(m * n)
+    # pairs of neighbor cells inside the mask
+    idx = np.arange(m * n).reshape(m, n)
+    a = np.concatenate([idx[1:][mask[1:] & mask[:-1]], idx[:, 1:][mask[:, 1:] & mask[:, :-1]]])
+    b = np.concatenate([idx[:-1][mask[1:] & mask[:-1]], idx[:, :-1][mask[:, 1:] & mask[:, :-1]]])
+    while True:
+        ra, rb = parent[a], parent[b]
+        if (ra == rb).all():
+            break
+        # hook the larger root to the smaller one
+        np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))
+        # compress the paths
+        while True:
+            grand = parent[parent]
+            if (grand == parent).all():
+                break
+            parent = grand
+    labels = np.full((m, n), -1)
+    roots, labels.ravel()[cells] = np.unique(parent[cells], return_inverse=True)
+    return labels, len(roots)
+
+def line(a, b):
+    """Return the arrays (i, j) of the cells on the segment from a to b."""
+    k = max(abs(b[0] - a[0]), abs(b[1] - a[1]))
+    t = np.linspace(0, 1, k + 1)
+    i = np.rint(a[0] + t * (b[0] - a[0])).astype(int)
+    j = np.rint(a[1] + t * (b[1] - a[1])).astype(int)
+    return i, j
+
+def line_of_sight(free, a, b):
+    """Return True if no blocked cell lies between a and b."""
+    i, j = line(a, b)
+    return bool(free[i[1:-1], j[1:-1]].all())
+
+def field_of_view(free, origin, radius):
+    """Return the mask of the cells within radius which origin can see:
+    all the rays are sampled at once, a cell is visible when the cells
+    before it on its ray are free."""
+    m, n = free.shape
+    i0, j0 = origin
+    i, j = np.mgrid[max(0, i0-radius):min(m, i0+radius+1), max(0, j0-radius):min(n, j0+radius+1)]
+    inside = (i - i0)**2 + (j - j0)**2 <= radius * radius
+    i, j = i[inside], j[inside]
+    t = np.linspace(0, 1, radius + 1)[None, :-1]  # samples before the end of each ray
+    ri = np.rint(i0 + t * (i - i0)[:, None]).astype(int)
+    rj = np.rint(j0 + t * (j - j0)[:, None]).astype(int)
+    blocked = ~free[ri, rj]
+    blocked[:, 0] = False  # the origin itself
+    # a sample equal to the target cell does not block it
+    blocked &= (ri != i[:, None]) | (rj != j[:, None])
+    visible = np.zeros((m, n), dtype=bool)
+    visible[i, j] = ~blocked.any(axis=1)
+    return visible
+
+
+if __name__ == '__main__':
+    import time
+
+    def bench(name, f, *args, **kw):
+        t0 = time.perf_counter()
+        result = f(*args, **kw)
+        print(f'{name:24} {(time.perf_counter() - t0) * 1000:8.1f} ms')
+        return result
+
+    rand = np.random.default_rng(0)
+    m = n = 1000
+    free = rand.random((m, n)) > 0.25
+    free[0, 0] = free[-1, -1] = True
+    cost = np.where(free, rand.integers(1, 10, (m, n)), np.inf)
+
+    dist = bench('distances', distances, free, [(0, 0)])
+    bench('distances diagonal', distances, free, [(0, 0)], diagonal=True)
+    bench('dijkstra', dijkstra, cost, [(0, 0)])
+    bench('flood fill', flood_fill, free, (0, 0))
+    bench('label', label, free)
+    path = bench('shortest path', shortest_path, free, (0, 0), (m-1, n-1))
+    path2 = bench('astar', astar, free, (0, 0), (m-1, n-1))
+    print(f'path length {len(path) - 1}, A* {len(path2) - 1}, distance {dist[m-1, n-1]}')
+    bench('line of sight x 1000', lambda: [line_of_sight(free, (0, 0), (k, n-1)) for k in range(1000)])
+    bench('field of view r=50', field_of_view, free, (500, 500), 50)
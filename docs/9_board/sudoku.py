@@ -1,5 +1,8 @@
 """Sudoko puzzle game."""
+import queue
+
 from app import *
+import sudoku_solver
 
 # https://en.wikipedia.org/wiki/Sudoku_solving_algorithms
 sudoku1 = """
@@ -27,19 +30,67 @@ sudoku2 = """
 .....1..4
 """
 
+class SudokuBoard(Sudoku):
+    """A Sudoku board which is solved in a background thread.
+    The thread puts the solution in a queue, update() takes it from there
+    in the main loop, where the board and status line may be changed."""
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.solutions = queue.Queue()
+
+    def solve(self):
+        App.scene.set_status('solving...')
+        sudoku_solver.solve_async(self.Num, self.solutions.put)
+
+    def update(self):
+        try:
+            solution = self.solutions.get_nowait()
+        except queue.Empty:
+            return
+        if solution is None:
+            App.scene.set_status('no solution')
+        else:
+            self.Num = solution
+            App.scene.set_status('solved')
+
 class Demo(App):
     def __init__(self):
         super().__init__()
 
         Scene(caption='Sudoku')
-        s = Sudoku(dx=20, dy=20)
+        s = SudokuBoard(dx=20, dy=20)
+        s.colors = [Color('white'), Color('pink')]  # pink marks conflicts
         s.set_Num(sudoku1)
-        s.render()
+        self.sudoku = s
 
-        Button('Reset', dir=(1, 0), cmd='print(123)')
+        Button('Reset', dir=(1, 0), cmd='App.root.reset()')
+        Button('Hint', dir=(0, 1), cmd='App.root.hint()')
+        Button('Check', cmd='App.root.check()')
+        Button('Solve', cmd='App.root.sudoku.solve()')
         # s2 = Sudoku(dir=(1, 0))
         # s2.set_Num(sudoku2)
 
+    def reset(self):
+        self.sudoku.Num = self.sudoku.Num0.copy()
+        self.sudoku.Col = np.zeros_like(self.sudoku.Num)
+
+    def hint(self):
+        h = sudoku_solver.hint(self.sudoku.Num)
+        if h == None:
+            App.scene.set_status('no hint')
+        else:
+            i, j, k, reason = h
+            self.sudoku.Num[i, j] = k
+            self.sudoku.dirty = True
+            App.scene.set_status(f'{k} at ({i}, {j}): {reason}')
+
+    def check(self):
+        Col = np.zeros_like(self.sudoku.Num)
+        for i, j in sudoku_solver.conflicts(self.sudoku.Num):
+            Col[i, j] = 1
+        self.sudoku.Col = Col
+        App.scene.set_status('solved' if sudoku_solver.is_solved(self.sudoku.Num) else 'not solved')
+
         
 
 if __name__ == '__main__':
@@ -0,0 +1,247 @@
+"""Sudoku solver and validator.
+
+The candidates of a cell are a 9-bit mask: the digits not yet used in its
+row, column and box. Naked singles (a cell with one candidate) and hidden
+singles (a digit with one place in a unit) are filled in until nothing
+changes, then the search tries the candidates of the cell with the fewest.
+
+Batch mode and benchmark, for a file with one puzzle per line:
+
+    python sudoku_solver.py puzzles.txt [processes]
+"""
+
+import itertools
+import threading
+
+import numpy as np
+
+ALL = 0x1FF  # the 9 digits
+
+ROW = [c // 9 for c in range(81)]
+COL = [c % 9 for c in range(81)]
+BOX = [c // 27 * 3 + c % 9 // 3 for c in range(81)]
+
+# the 27 units (rows, columns and boxes) as lists of cells
+UNITS = ([[r*9 + c for c in range(9)] for r in range(9)] +
+         [[r*9 + c for r in range(9)] for c in range(9)] +
+         [[c for c in range(81) if BOX[c] == b] for b in range(9)])
+
+COUNT = [bin(m).count('1') for m in range(512)]  # number of candidates
+DIGIT = {1 << d: d + 1 for d in range(9)}        # digit of a single bit
+
+
+class Grid:
+    """The cells of a sudoku and the used digits of each row, column and box."""
+
+    def __init__(self, cells):
+        self.cells = [0] * 81
+        self.rows = [0] * 9
+        self.cols = [0] * 9
+        self.boxes = [0] * 9
+        self.valid = True
+        for c, k in enumerate(cells):
+            if k != 0:
+                if not self.candidates(c) & (1 << (k-1)):
+                    self.valid = False
+                self.place(c, k)
+
+    def copy(self):
+        grid = Grid.__new__(Grid)
+        grid.cells = self.cells[:]
+        grid.rows = self.rows[:]
+        grid.cols = self.cols[:]
+        grid.boxes = self.boxes[:]
+        grid.valid = self.valid
+        return grid
+
+    def candidates(self, c):
+        return ALL & ~(self.rows[ROW[c]] | self.cols[COL[c]] | self.boxes[BOX[c]])
+
+    def place(self, c, k):
+        bit = 1 << (k-1)
+        self.cells[c] = k
+        self.rows[ROW[c]] |= bit
+        self.cols[COL[c]] |= bit
+        self.boxes[BOX[c]] |= bit
+
+    def singles(self):
+        """Yield (cell, digit, reason) for each naked and hidden single.
+        Yield (None, 0, reason) if a cell or a digit has no place left."""
+        cells = self.cells
+        for c in range(81):
+            if cells[c] == 0:
+                cand = self.candidates(c)
+                if cand == 0:
+                    yield None, 0, 'no candidate'
+                    return
+                if cand & (cand-1) == 0:
+                    yield c, DIGIT[cand], 'naked single'
+
+        for unit in UNITS:
+            once = twice = used = 0
+            for c in unit:
+                if cells[c] == 0:
+                    cand = self.candidates(c)
+                    twice |= once & cand
+                    once |= cand
+                else:
+                    used |= 1 << (cells[c]-1)
+            if once | used != ALL:
+                yield None, 0, 'no place for a digit'
+                return
+            hidden = once & ~twice
+            while hidden:
+                bit = hidden & -hidden
+                hidden ^= bit
+                for c in unit:
+                    if cells[c] == 0 and self.candidates(c) & bit:
+                        yield c, DIGIT[bit], 'hidden single'
+                        break
+
+    def propagate(self):
+        """Fill in the singles until none is left, return False on a contradiction."""
+        while True:
+            progress = False
+            for c, k, reason in self.singles():
+                if c == None:
+                    return False
+                if self.cells[c] == 0:
+                    if not self.candidates(c) & (1 << (k-1)):
+                        return False
+                    self.place(c, k)
+                    progress = True
+            if not progress:
+                return True
+
+    def solutions(self):
+        """Yield the solutions, as lists of 81 digits."""
+        if not self.valid or not self.propagate():
+            return
+        # choose the empty cell with the minimum remaining values
+        best, best_cand, best_n = None, 0, 10
+        for c in range(81):
+            if self.cells[c] == 0:
+                cand = self.candidates(c)
+                n = COUNT[cand]
+                if n < best_n:
+                    best, best_cand, best_n = c, cand, n
+                    if n == 2:
+                        break
+        if best == None:
+            yield self.cells
+            return
+        while best_cand:
+            bit = best_cand & -best_cand
+            best_cand ^= bit
+            grid = self.copy()
+            grid.place(best, DIGIT[bit])
+            yield from grid.solutions()
+
+
+def to_cells(grid):
+    """Return the 81 digits of a 9x9 array (for example Sudoku.Num) as a list."""
+    return np.asarray(grid).ravel().tolist()
+
+def to_array(cells):
+    return np.array(cells, dtype='int8').reshape(9, 9)
+
+def solve(grid):
+    """Return the solution of a 9x9 array as an array, or None."""
+    cells = next(Grid(to_cells(grid)).solutions(), None)
+    return None if cells == None else to_array(cells)
+
+def count_solutions(grid, limit=2):
+    """Count the solutions, up to limit (2 is enough to check uniqueness)."""
+    return sum(1 for _ in itertools.islice(Grid(to_cells(grid)).solutions(), limit))
+
+def conflicts(grid):
+    """Return the cells (i, j) whose digit is repeated in a row, column or box."""
+    cells = to_cells(grid)
+    result = set()
+    for unit in UNITS:
+        seen = {}
+        for c in unit:
+            k = cells[c]
+            if k != 0:
+                seen.setdefault(k, []).append(c)
+        for same in seen.values():
+            if len(same) > 1:
+                result.update(divmod(c, 9) for c in same)
+    return result
+
+def is_solved(grid):
+    """Check that the grid is complete and without conflicts."""
+    return 0 not in to_cells(grid) and not conflicts(grid)
+
+def hint(grid):
+    """Return a next move (i, j, k, reason), or None if the grid is full or unsolvable.
+    Singles are preferred, otherwise the digit comes from the solution."""
+    g = Grid(to_cells(grid))
+    if not g.valid:
+        return None
+    for c, k, reason in g.singles():
+        if c == None:
+            return None
+        return (*divmod(c, 9), k, reason)
+    cells = next(g.solutions(), None)
+    if cells == None:
+        return None
+    for c in range(81):
+        if g.cells[c] == 0:
+            return (*divmod(c, 9), cells[c], 'search')
+    return None
+
+def solve_many(puzzles, processes=1):
+    """Solve an array of puzzles (count, 9, 9), return the solutions and a
+    mask of the solved puzzles. Unsolved puzzles are left as they are."""
+    puzzles = np.asarray(puzzles)
+    if processes > 1:
+        import multiprocessing
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(solve, puzzles, chunksize=64)
+    else:
+        results = [solve(p) for p in puzzles]
+    solved = np.array([r is not None for r in results], dtype=bool)
+    solutions = puzzles.astype('int8')
+    for i, r in enumerate(results):
+        if r is not None:
+            solutions[i] = r
+    return solutions, solved
+
+def solve_async(grid, callback):
+    """Solve in a background thread, callback(solution) is called from that thread.
+    It should only hand the solution over to the main loop, e.g. with queue.Queue.put."""
+    grid = np.array(grid)
+    thread = threading.Thread(target=lambda: callback(solve(grid)), daemon=True)
+    thread.start()
+    return thread
+
+
+# hard puzzles, used by the benchmark when no file is given
+samples = """
+8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..
+..53.....8......2..7..1.5..4....53...1..7...6..32...8..6.5....9..4....3......97..
+12.3....435....1....4........54..2..6...7.........8.9...31..5.......9.7.....6...8
+4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......
+"""
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    from app import PuzzlePack
+
+    if len(sys.argv) > 1:
+        batches = PuzzlePack.stream(sys.argv[1], 9, 9)
+    else:
+        batches = [PuzzlePack.parse(samples.encode(), 9, 9)]
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    n = n_solved = 0
+    t0 = time.perf_counter()
+    for batch in batches:
+        solutions, solved = solve_many(batch, processes)
+        n += len(batch)
+        n_solved += solved.sum()
+    dt = time.perf_counter() - t0
+    print(f'{n} puzzles, {n_solved} solved in {dt:.3f} s: {n/dt:.0f} puzzles/s')
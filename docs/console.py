@@ -1,9 +1,13 @@
+import re
 import pygame
 
 # Define some colors
 BLACK    = (   0,   0,   0)
 WHITE    = ( 255, 255, 255)
 
+# Numbers are composed from the glyphs of a digit atlas
+NUMBER = re.compile(r'([0-9.-]+)')
+
 # This is a simple class that will help us print to the screen
 # It has nothing to do with the joysticks, just outputting the
 # information.
@@ -11,10 +15,40 @@ class TextPrint:
     def __init__(self):
         self.reset()
         self.font = pygame.font.Font(None, 20)
+        self.words = {}  # rendered words, they repeat every frame
+        self.make_digits()
+
+    def make_digits(self):
+        # One surface with '0123456789.-', the digits have the same width
+        w = max(self.font.size(c)[0] for c in '0123456789')
+        widths = [w] * 10 + [self.font.size(c)[0] for c in '.-']
+        h = self.font.get_height()
+        self.digits = pygame.Surface((sum(widths), h), pygame.SRCALPHA)
+        self.areas = {}
+        x = 0
+        for c, w in zip('0123456789.-', widths):
+            img = self.font.render(c, True, BLACK)
+            self.digits.blit(img, (x + (w - img.get_width()) // 2, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            self.areas[c] = pygame.Rect(x, 0, w, h)
+            x += w
 
     def print(self, screen, textString):
-        textBitmap = self.font.render(textString, True, BLACK)
-        screen.blit(textBitmap, [self.x, self.y])
+        # Blit the cached words and the digits of the numbers at once
+        x = self.x
+        seq = []
+        for k, run in enumerate(NUMBER.split(textString)):
+            if k % 2:
+                for c in run:
+                    seq.append((self.digits, (x, self.y), self.areas[c]))
+                    x += self.areas[c].width
+            elif run:
+                if run not in self.words:
+                    if len(self.words) > 256:
+                        self.words.clear()
+                    self.words[run] = self.font.render(run, True, BLACK)
+                seq.append((self.words[run], (x, self.y)))
+                x += self.words[run].get_width()
+        screen.blits(seq, doreturn=False)
         self.y += self.line_height
         
     def reset(self):
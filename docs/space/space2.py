@@ -88,9 +88,13 @@ class Text:
     def __init__(self, text, pos):
         self.font = pygame.font.Font(None, 36)
         self.rect = Rect(pos, (0, 0))
+        self.text = None
         self.set(text)
         
     def set(self, text):
+        """Render the text again only when it changes."""
+        if text == self.text:
+            return
         self.text = text
         self.img = self.font.render(self.text, True, Color('white'))
         self.rect.size = self.img.get_size()
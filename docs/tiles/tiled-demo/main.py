@@ -1,3 +1,4 @@
+import re
 import pygame, pytmx
 
 #Background color
@@ -14,19 +15,54 @@ pygame.init()
 screen = pygame.display.set_mode([SCREEN_WIDTH, SCREEN_HEIGHT])
 pygame.display.set_caption("Pygame Tiled Demo")
 
+#Numbers in texts are composed from the glyphs of a digit atlas
+NUMBER = re.compile(r'([0-9.-]+)')
+
 class Text:
     def __init__(self, text, pos=(0, 0)):
         self.font = pygame.font.Font(None, 24)
         self.color = (255, 255, 255)
-        self.text = text
+        self.words = {}  # rendered words, such as the 'fps:' label
+        self.make_digits()
+        self.text = None
         self.pos = pos
         self.render(text)
 
+    def make_digits(self):
+        #One surface with the glyphs of '0123456789.-', the digits have the
+        #same width so that changing numbers do not jitter
+        w = max(self.font.size(c)[0] for c in '0123456789')
+        widths = [w] * 10 + [self.font.size(c)[0] for c in '.-']
+        h = self.font.get_height()
+        self.digits = pygame.Surface((sum(widths), h), pygame.SRCALPHA)
+        self.areas = {}
+        x = 0
+        for c, w in zip('0123456789.-', widths):
+            img = self.font.render(c, 1, self.color)
+            self.digits.blit(img, (x + (w - img.get_width()) // 2, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            self.areas[c] = pygame.Rect(x, 0, w, h)
+            x += w
+
     def render(self, text):
-        self.image = self.font.render(text, 1, self.color)
+        #Render the words once and place the digits of the numbers
+        if text == self.text:
+            return
+        self.text = text
+        self.seq = []
+        x, y = self.pos
+        for k, run in enumerate(NUMBER.split(text)):
+            if k % 2:
+                for c in run:
+                    self.seq.append((self.digits, (x, y), self.areas[c]))
+                    x += self.areas[c].width
+            elif run:
+                if run not in self.words:
+                    self.words[run] = self.font.render(run, 1, self.color)
+                self.seq.append((self.words[run], (x, y)))
+                x += self.words[run].get_width()
 
     def draw(self):
-        screen.blit(self.image, self.pos)
+        screen.blits(self.seq, doreturn=False)
 
 
 class Game: